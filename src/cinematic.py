@@ -13,7 +13,11 @@ from typing import List, Optional, Callable, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
-from config import calculate_delay, DEFAULT_SPEED, IMAGES_DIR
+from config import calculate_delay, DEFAULT_SPEED, SPRITE_MAX_SIDE, SPRITE_MAX_STRETCH
+from image_store import display_path
+from image_catalog import get_image_catalog
+
+MAX_SPRITE_ASPECT = 3.0   # Wider (or taller) images are banners, not worth floating
 
 
 @dataclass
@@ -254,15 +258,25 @@ class CinematicOverlay:
     def add_floating_image(self, image_path: str, start_pos: str = "random"):
         """Add a floating image element"""
         try:
-            img = Image.open(image_path)
-
-            # Random size
+            # Random size; with a catalogued aspect, every shape covers the
+            # same area instead of wide images coming out as thin strips
             scale = random.uniform(0.3, 0.8)
-            max_dim = min(400, self.screen_width // 3)
-            img.thumbnail((int(max_dim * scale), int(max_dim * scale)), Image.Resampling.LANCZOS)
+            max_dim = min(SPRITE_MAX_SIDE / 0.8, self.screen_width // 3)   # Top scale is SPRITE_MAX_SIDE
+            side = max_dim * scale
+            record = get_image_catalog().get(image_path)
+            if record and record.aspect:
+                root, longest = record.aspect ** 0.5, side * SPRITE_MAX_STRETCH
+                box = (int(min(side * root, longest)), int(min(side / root, longest)))
+            else:
+                box = (int(side), int(side))
+
+            # Sprite derivative is pre-oriented RGBA at the largest size we draw
+            img = Image.open(display_path(image_path, 'sprite'))
+            img.thumbnail(box, Image.Resampling.LANCZOS)
 
             # Add slight vignette/glow effect
-            img = img.convert('RGBA')
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
 
             photo = ImageTk.PhotoImage(img)
             self.background_images.append(photo)  # Keep reference
@@ -470,15 +484,15 @@ class CinematicOverlay:
             time.sleep(self.frame_time)
 
     def _get_random_images(self, count: int = 1) -> List[str]:
-        """Get random images from the data folder"""
+        """Random images (no near-duplicates), skipping banner-shaped ones"""
+        catalog = get_image_catalog()
         images = []
-        if IMAGES_DIR.exists():
-            all_images = list(IMAGES_DIR.rglob("*.jpg")) + \
-                        list(IMAGES_DIR.rglob("*.png")) + \
-                        list(IMAGES_DIR.rglob("*.webp"))
-            if all_images:
-                images = [str(p) for p in random.sample(all_images, min(count, len(all_images)))]
-        return images
+        for path in catalog.sample(count * 2):
+            record = catalog.get(path)
+            if record and record.aspect and not 1 / MAX_SPRITE_ASPECT <= record.aspect <= MAX_SPRITE_ASPECT:
+                continue
+            images.append(path)
+        return images[:count]
 
     def _content_loop(self):
         """Background content fetching loop"""
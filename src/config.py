@@ -6,12 +6,16 @@ from pathlib import Path
 
 # Base directories
 BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = Path(os.environ.get("CHESSMASTER_DATA_DIR", BASE_DIR / "data"))
 CONTENT_DIR = DATA_DIR / "content"
 IMAGES_DIR = DATA_DIR / "images"
 PDFS_DIR = DATA_DIR / "pdfs"
 PRESENTATIONS_DIR = DATA_DIR / "presentations"
 CACHE_DIR = DATA_DIR / "cache"
+CONTENT_DB = DATA_DIR / "content.db"   # Content items (data/content/*.json is migrated into it)
+CONTENT_CACHE_MAX_BYTES = 32 * 1024 * 1024   # Item bodies kept in memory (LRU)
+WATCH_HISTORY_FILE = CACHE_DIR / "watch_history.log"   # Append-only: one line per item used in a lesson
+WATCH_RECENT_KEEP = 50    # Most recently watched items held back when the unused pool is recycled
 
 # Ensure directories exist
 for dir_path in [DATA_DIR, CONTENT_DIR, IMAGES_DIR, PDFS_DIR, PRESENTATIONS_DIR, CACHE_DIR]:
@@ -157,6 +161,104 @@ MAX_CONTENT_LENGTH = 50000  # Max characters per content piece
 MIN_CONTENT_LENGTH = 100   # Minimum useful content length
 MAX_IMAGES_PER_TOPIC = 10
 MAX_PARAGRAPHS_PER_SLIDE = 3
+HTML_EXTRACTION_BACKEND = "auto"   # 'auto' (lxml if installed), 'lxml' or 'bs4'
+
+# Fetch settings
+PAGES_PER_TOPIC = 5        # Result pages fetched per topic search
+FETCH_CONCURRENCY = 4      # Max pages/images fetched in parallel
+
+# Per-host politeness (token bucket): sustained requests/second and burst size
+HOST_RATE_LIMIT = 2.0
+HOST_BURST = 3
+HOST_RATE_OVERRIDES = {
+    # domain: (requests_per_second, burst) - also applies to subdomains
+    "chess.com": (2.0, 2),
+    "lichess.org": (2.0, 2),
+    "duckduckgo.com": (1.0, 1),
+}
+
+# Host health: failing hosts are skipped for base * 2^(failures-1) seconds, capped
+HOST_HEALTH_FILE = CACHE_DIR / "host_health.json"
+HOST_BACKOFF_BASE = 5 * 60
+HOST_BACKOFF_MAX = 24 * 3600
+
+# HTTP response cache (conditional GETs, LRU-evicted by total body size)
+HTTP_CACHE_DIR = CACHE_DIR / "http"
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+HTTP_CACHE_MAX_ENTRY_BYTES = 16 * 1024 * 1024
+HTTP_CACHE_SAVE_EVERY = 50     # Changes between index snapshots (a lost entry is just refetched)
+
+# Shared HTTP transport (one session, keep-alive pools, bounded retries)
+HTTP_POOL_HOSTS = 32                          # Hosts with an open connection pool
+HTTP_POOL_MAXSIZE = FETCH_CONCURRENCY * 2     # Keep-alive connections per host (pages + images)
+HTTP_CONNECT_TIMEOUT = 5.0
+HTTP_READ_TIMEOUT = 15.0
+HTTP_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.5                      # Seconds, doubled per retry, jittered
+HTTP_RETRY_STATUSES = (500, 502, 503, 504)    # 429 is left to the host backoff
+
+# Web mode: 'live', 'record' (archive every GET and search) or 'replay' (serve from the archive)
+WEB_MODE = os.environ.get("CHESSMASTER_WEB_MODE", "live")
+WEB_ARCHIVE_DIR = Path(os.environ.get("CHESSMASTER_WEB_ARCHIVE", CACHE_DIR / "web_archive"))
+
+# Search backends, tried in order until one returns new results:
+# 'ddgs' (DuckDuckGo), 'local' (BM25 over data/content), 'sites' (chess-site search pages)
+SEARCH_BACKENDS = ["ddgs", "local", "sites"]
+TEXT_INDEX_FILE = CACHE_DIR / "text_index.json"
+TEXT_INDEX_MAX_CHARS = 5000    # Body characters indexed per item
+TEXT_INDEX_SAVE_EVERY = 25     # Changes between index snapshots (the store resyncs any gap)
+
+# Background crawler over CHESS_DOMAINS (off unless main.py --crawl)
+CRAWL_ENABLED = False
+CRAWL_FRONTIER_DB = CACHE_DIR / "frontier.db"
+CRAWL_MAX_DEPTH = 2                  # Link hops from a sitemap entry or search result
+CRAWL_MAX_PAGES_PER_SESSION = 500
+CRAWL_MAX_PAGES_PER_HOST = 100       # Per session
+CRAWL_FRONTIER_MAX = 20000           # Lowest-priority queued URLs are dropped beyond this
+CRAWL_SITEMAP_URLS = 2000            # URLs taken from one domain's sitemaps
+CRAWL_SITEMAPS_PER_DOMAIN = 5        # Child sitemaps followed from a sitemap index
+CRAWL_RESEED_DAYS = 7                # Re-read a domain's sitemaps after this long
+CRAWL_TARGET_UNUSED = 20             # Crawl only while fewer unused items are stored
+CRAWL_IDLE_SECONDS = 10.0
+CRAWL_MAX_ATTEMPTS = 3               # Fetch attempts before a URL is given up as failed
+
+# Search result cache (seconds); empty results are cached for less time
+SEARCH_CACHE_FILE = CACHE_DIR / "search_results.json"
+SEARCH_CACHE_TTL = 7 * 24 * 3600
+SEARCH_NEGATIVE_TTL = 6 * 3600
+
+# URL frontier store (replaces searched_urls.json)
+URL_STORE_DB = CACHE_DIR / "urls.db"
+URL_STORE_MAX_AGE_DAYS = 180       # URLs not seen for this long are evicted
+URL_BLOOM_CAPACITY = 1_000_000     # Grows automatically as the store does
+URL_BLOOM_ERROR_RATE = 0.01
+
+# Streamed download limits (bytes). HTML/text are truncated at the cap,
+# PDFs and images over the cap are abandoned.
+DOWNLOAD_BYTE_CAPS = {
+    "html": 2 * 1024 * 1024,
+    "text": 1 * 1024 * 1024,
+    "pdf": 20 * 1024 * 1024,
+    "image": 8 * 1024 * 1024,
+}
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_HEAD_PREFLIGHT = False    # Send HEAD first to reject by type/size
+
+# Content-addressed image index (sha256 -> stored file)
+IMAGE_INDEX_FILE = CACHE_DIR / "image_index.json"
+IMAGE_CATALOG_FILE = CACHE_DIR / "image_catalog.json"   # path -> topics, size, dimensions, format, dHash
+IMAGE_CATALOG_REFRESH_SECONDS = 300   # Rescan changed image folders for files saved outside the ingestor
+IMAGE_DUPLICATE_MAX_DISTANCE = 10   # of 256 dHash bits; resized/recompressed copies differ by 0-8
+
+# Near-duplicate detection (64-bit SimHash; items within this many bits are duplicates)
+SIMHASH_INDEX_FILE = CACHE_DIR / "simhash_index.json"
+NEAR_DUPLICATE_MAX_DISTANCE = 6   # ~5% of word pairs changed; unrelated pages differ by 16+
+
+# PDF text extraction (separate process pool, cached by PDF sha256)
+PDF_TEXT_CACHE_DIR = CACHE_DIR / "pdf_text"
+PDF_WORKERS = 2
+PDF_TIME_BUDGET = 10.0     # Seconds of parsing per document; later pages are skipped
+PDF_MAX_PAGES = 30
 
 # Presentation settings
 PRESENTATION_TITLE = "ChessMaster Learning System"
@@ -164,3 +266,17 @@ BACKGROUND_COLOR = "#1a1a2e"
 TEXT_COLOR = "#eaeaea"
 ACCENT_COLOR = "#e94560"
 SECONDARY_COLOR = "#16213e"
+
+# Presentation image frame: share of the screen width by image layout, less a margin, by a share of the height
+IMAGE_FRAME_SHARE = {'wide': 0.45, 'square': 0.35, 'tall': 0.28}
+DEFAULT_FRAME_SHARE = 0.35
+IMAGE_FRAME_MARGIN = 0.02
+IMAGE_FRAME_HEIGHT = 0.6
+
+# Pre-scaled image derivatives made at ingest time
+DISPLAY_SCREEN_SIZE = (2560, 1440)   # Largest screen the display derivative fills without upscaling
+DISPLAY_IMAGE_SIZE = (int(DISPLAY_SCREEN_SIZE[0] * (max(IMAGE_FRAME_SHARE.values()) - IMAGE_FRAME_MARGIN)),
+                      int(DISPLAY_SCREEN_SIZE[1] * IMAGE_FRAME_HEIGHT))   # The widest frame there
+SPRITE_MAX_SIDE = 320             # Side of the largest square cinematic floating image
+SPRITE_MAX_STRETCH = 1.6          # Long edge of a wide or tall sprite, relative to that side
+SPRITE_IMAGE_SIZE = int(SPRITE_MAX_SIDE * SPRITE_MAX_STRETCH)   # Largest box a sprite is drawn in
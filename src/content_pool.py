@@ -0,0 +1,158 @@
+"""
+Content Pool
+Shuffle bag of content not yet shown, backed by an append-only watch
+history so items seen in earlier sessions are not replayed first
+"""
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config import WATCH_HISTORY_FILE, WATCH_RECENT_KEEP
+
+COMPACT_FACTOR = 4   # Rewrite the log once it has this many lines per watched item
+
+
+class ContentPool:
+    """
+    Two tiers, every operation O(1):
+      fresh   - never watched; a list plus id -> slot map, drawn at random
+                by swapping the chosen slot with the last one
+      watched - id -> last watch time, least recently watched first
+    When fresh runs out, the least recently watched items are recycled
+    into it, holding back the WATCH_RECENT_KEEP most recent (at most half,
+    so a small corpus still cycles); amortised O(1) per draw.
+    """
+
+    def __init__(self, history_file: Path = WATCH_HISTORY_FILE, keep_recent: int = WATCH_RECENT_KEEP):
+        self.history_file = Path(history_file)
+        self.keep_recent = keep_recent
+        self._lock = threading.Lock()
+        self._fresh: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self._watched: "OrderedDict[str, float]" = OrderedDict()
+        self._log_lines = 0
+        self.draws = 0
+        self.recycles = 0
+        self._history = self._read_history()
+
+    def _read_history(self) -> "OrderedDict[str, float]":
+        """Last watch time of every id in the log, oldest first"""
+        history: "OrderedDict[str, float]" = OrderedDict()
+        if not self.history_file.exists():
+            return history
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) != 2:
+                        continue  # Torn last line after a crash
+                    history.pop(parts[1], None)
+                    history[parts[1]] = float(parts[0])
+                    self._log_lines += 1
+        except (OSError, ValueError) as e:
+            print(f"Watch history unreadable, starting fresh: {e}")
+            history.clear()
+        return history
+
+    def load(self, content_ids: Iterable[str]):
+        """Populate from the stored items; previously watched ones go behind the fresh ones"""
+        known = set(content_ids)
+        with self._lock:
+            for content_id, watched_at in self._history.items():
+                if content_id in known:
+                    self._watched[content_id] = watched_at
+            for content_id in known:
+                if content_id not in self._watched:
+                    self._add_fresh(content_id)
+            self._history.clear()
+            if self._log_lines > COMPACT_FACTOR * max(len(self._watched), 100):
+                self._compact()
+
+    def _add_fresh(self, content_id: str):
+        self._slots[content_id] = len(self._fresh)
+        self._fresh.append(content_id)
+
+    def _take_fresh(self, slot: int) -> str:
+        """Remove the id at a slot by moving the last id into it (caller holds the lock)"""
+        content_id = self._fresh[slot]
+        last = self._fresh.pop()
+        if last != content_id:
+            self._fresh[slot] = last
+            self._slots[last] = slot
+        del self._slots[content_id]
+        return content_id
+
+    def add(self, content_id: str):
+        """New content joins the fresh tier"""
+        with self._lock:
+            if content_id not in self._slots and content_id not in self._watched:
+                self._add_fresh(content_id)
+
+    def draw(self) -> Optional[str]:
+        """A random fresh id (recycling old watches if none are left), recorded as watched"""
+        with self._lock:
+            if not self._fresh:
+                self._recycle()
+            if not self._fresh:
+                return None
+            content_id = self._take_fresh(random.randrange(len(self._fresh)))
+            self._record(content_id)
+            self.draws += 1
+        return content_id
+
+    def mark_watched(self, content_id: str):
+        """Record an id chosen some other way (e.g. by topic)"""
+        with self._lock:
+            slot = self._slots.get(content_id)
+            if slot is not None:
+                self._take_fresh(slot)
+            self._record(content_id)
+
+    def is_fresh(self, content_id: str) -> bool:
+        return content_id in self._slots
+
+    def fresh_count(self) -> int:
+        return len(self._fresh)
+
+    def _recycle(self):
+        """Move all but the most recently watched items back to fresh (caller holds the lock)"""
+        recyclable = len(self._watched) - min(self.keep_recent, len(self._watched) // 2)
+        for _ in range(recyclable):
+            content_id, _ = self._watched.popitem(last=False)
+            self._add_fresh(content_id)
+        if recyclable > 0:
+            self.recycles += 1
+
+    def _record(self, content_id: str):
+        """Move an id to the most-recent end and append it to the log (caller holds the lock)"""
+        now = time.time()
+        self._watched.pop(content_id, None)
+        self._watched[content_id] = now
+        try:
+            with open(self.history_file, 'a', encoding='utf-8') as f:
+                f.write(f"{now:.3f}\t{content_id}\n")
+            self._log_lines += 1
+        except OSError as e:
+            print(f"Could not append to watch history: {e}")
+
+    def _compact(self):
+        """Rewrite the log with one line per watched id (caller holds the lock)"""
+        tmp_file = self.history_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for content_id, watched_at in self._watched.items():
+                f.write(f"{watched_at:.3f}\t{content_id}\n")
+        os.replace(tmp_file, self.history_file)
+        self._log_lines = len(self._watched)
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                'fresh': len(self._fresh),
+                'watched': len(self._watched),
+                'draws': self.draws,
+                'recycles': self.recycles,
+            }
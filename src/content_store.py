@@ -0,0 +1,251 @@
+"""
+Content Store
+All fetched content items in one SQLite database (WAL) instead of one
+JSON file each: metadata columns for scans without reading bodies, the
+full item as compact JSON for point lookups and bulk loads
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import CONTENT_DB, CONTENT_DIR, CONTENT_CACHE_MAX_BYTES
+
+# Columns kept outside the JSON body so listing the corpus never parses bodies
+METADATA_FIELDS = ('id', 'title', 'url', 'topic', 'source_type', 'timestamp',
+                   'excerpt_count', 'image_count', 'size')
+
+
+def encode_content(content: dict) -> str:
+    """Stored (compact JSON) form of an item; its UTF-8 length is the item's size"""
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':'))
+
+
+class ContentStore:
+    """
+    Content items keyed by id. Every write is a single-row upsert, so
+    adding an item costs the same however large the corpus is.
+    """
+
+    def __init__(self, db_path: Path = CONTENT_DB):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS content (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                source_type TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                excerpt_count INTEGER NOT NULL DEFAULT 0,
+                image_count INTEGER NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL DEFAULT 0,
+                body TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS content_timestamp ON content(timestamp);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _row(content: dict) -> tuple:
+        body = encode_content(content)
+        return (
+            content['id'],
+            content.get('title') or '',
+            content.get('url') or '',
+            content.get('topic') or '',
+            content.get('source_type') or '',
+            content.get('timestamp') or '',
+            len(content.get('excerpts') or []),
+            len(content.get('local_images') or []),
+            len(body.encode('utf-8')),
+            body,
+        )
+
+    def put(self, content: dict) -> int:
+        """Insert or replace one item; returns its stored size"""
+        return self._write([self._row(content)])
+
+    def put_many(self, items: Iterable[dict]) -> int:
+        """Insert or replace many items in one transaction; returns the count"""
+        rows = [self._row(content) for content in items]
+        self._write(rows)
+        return len(rows)
+
+    def _write(self, rows: List[tuple]) -> int:
+        """Upsert rows; returns their total stored size"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO content (id, title, url, topic, source_type, timestamp, "
+                "excerpt_count, image_count, size, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return sum(row[8] for row in rows)
+
+    def get(self, content_id: str) -> Optional[dict]:
+        found = self.get_sized(content_id)
+        return found[0] if found else None
+
+    def get_sized(self, content_id: str) -> Optional[Tuple[dict, int]]:
+        """(item, stored size in bytes), or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT body, size FROM content WHERE id = ?", (content_id,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def size_of(self, content_id: str) -> Optional[int]:
+        """Stored size in bytes of an item, or None if it is not stored"""
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM content WHERE id = ?", (content_id,)).fetchone()
+        return row[0] if row else None
+
+    def delete(self, content_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM content WHERE id = ?", (content_id,))
+            self._conn.commit()
+
+    def __contains__(self, content_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM content WHERE id = ?", (content_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM content").fetchone()[0]
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM content")]
+
+    def _scan(self, sql: str) -> Iterator[tuple]:
+        """Rows of a query, fetched under the lock so callers can work between rows"""
+        with self._lock:
+            rows = self._conn.execute(sql).fetchall()
+        yield from rows
+
+    def iter_content(self) -> Iterator[dict]:
+        """Every item, oldest first (bulk load)"""
+        for (body,) in self._scan("SELECT body FROM content ORDER BY timestamp, id"):
+            yield json.loads(body)
+
+    def iter_metadata(self) -> Iterator[Dict]:
+        """METADATA_FIELDS of every item, oldest first, without reading bodies"""
+        columns = ', '.join(METADATA_FIELDS)
+        for row in self._scan(f"SELECT {columns} FROM content ORDER BY timestamp, id"):
+            yield dict(zip(METADATA_FIELDS, row))
+
+    def migrate_json(self, content_dir: Path = CONTENT_DIR) -> int:
+        """Import the legacy one-file-per-item directory, then retire it"""
+        files = sorted(content_dir.glob("*.json")) if content_dir.exists() else []
+        if not files:
+            return 0
+        items = []
+        for content_file in files:
+            try:
+                with open(content_file, 'r', encoding='utf-8') as f:
+                    content = json.load(f)
+            except Exception as e:
+                print(f"Could not migrate {content_file}: {e}")
+                continue
+            if content.get('id'):
+                items.append(content)
+        self.put_many(items)
+        # Keep the originals (renamed) rather than deleting anyone's data
+        retired = content_dir.with_name(content_dir.name + '.migrated')
+        retired.mkdir(exist_ok=True)
+        for content_file in files:
+            content_file.replace(retired / content_file.name)
+        print(f"Migrated {len(items)} content items from {content_dir.name}/ to {self.db_path.name}")
+        return len(items)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ContentCache:
+    """
+    Bounded LRU of item bodies in front of the store, accounted by stored
+    size, so memory stays flat however many items the store holds.
+    put() writes through to the store; remember() caches an item already there.
+    """
+
+    def __init__(self, store: ContentStore, max_bytes: int = CONTENT_CACHE_MAX_BYTES):
+        self.store = store
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[dict, int]]" = OrderedDict()  # id -> (item, size), LRU first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, content_id: str, content: dict, size: int):
+        """Cache an item and evict from the LRU end (caller holds the lock)"""
+        old = self._entries.pop(content_id, None)
+        if old is not None:
+            self._total_bytes -= old[1]
+        if size > self.max_bytes:
+            return
+        self._entries[content_id] = (content, size)
+        self._total_bytes += size
+        while self._total_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_size
+
+    def get(self, content_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(content_id)
+            if entry is not None:
+                self._entries.move_to_end(content_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        found = self.store.get_sized(content_id)
+        if found is None:
+            return None
+        with self._lock:
+            self._remember(content_id, *found)
+        return found[0]
+
+    def put(self, content: dict):
+        """Store an item and keep it cached (it is likely to be used soon)"""
+        size = self.store.put(content)
+        with self._lock:
+            self._remember(content['id'], content, size)
+
+    def remember(self, content: dict) -> bool:
+        """Cache an item the store already holds, without writing it again; False if it is not stored"""
+        size = self.store.size_of(content['id'])
+        if size is None:
+            return False
+        with self._lock:
+            self._remember(content['id'], content, size)
+        return True
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                'cached_items': len(self._entries),
+                'cached_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_shared_store: Optional[ContentStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_content_store() -> ContentStore:
+    """Process-wide content store, importing data/content/*.json on first use"""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = ContentStore()
+            _shared_store.migrate_json()
+        return _shared_store
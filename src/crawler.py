@@ -0,0 +1,433 @@
+"""
+Background Crawler
+Keeps the corpus filled ahead of demand by crawling the trusted
+CHESS_DOMAINS: a persistent, prioritized URL frontier seeded from each
+domain's sitemaps and from in-domain article links found in fetched pages
+"""
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from config import (
+    CHESS_DOMAINS, CHESS_TOPICS, USER_AGENT,
+    CRAWL_FRONTIER_DB, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES_PER_SESSION, CRAWL_MAX_PAGES_PER_HOST,
+    CRAWL_FRONTIER_MAX, CRAWL_SITEMAP_URLS, CRAWL_SITEMAPS_PER_DOMAIN, CRAWL_RESEED_DAYS,
+    CRAWL_TARGET_UNUSED, CRAWL_IDLE_SECONDS, CRAWL_MAX_ATTEMPTS
+)
+from rate_limiter import host_key
+from text_index import tokenize
+from url_utils import canonicalize_url
+
+LOC_RE = re.compile(r'<loc>\s*(?:<!\[CDATA\[)?\s*([^<\]\s]+)', re.IGNORECASE)
+SITEMAP_INDEX_RE = re.compile(r'<sitemapindex\b', re.IGNORECASE)
+ARTICLE_PATH_RE = re.compile(
+    r'/(article|articles|blog|news|lessons?|learn|study|openings?|endgames?|tactics?|'
+    r'strategy|guides?|games?|players?|history)(/|$|-)', re.IGNORECASE)
+SKIPPED_PATH_RE = re.compile(
+    r'/(login|signin|signup|register|logout|account|member|members|settings|cart|shop|store|'
+    r'checkout|search|tag|tags|category|categories|author|feed|rss|forum|cdn-cgi|wp-admin|wp-json)'
+    r'(/|$)|/page/\d+|\.(jpe?g|png|gif|webp|svg|css|js|ico|zip|gz|pgn|mp4|mp3|json|xml)$',
+    re.IGNORECASE)
+TOPIC_TERMS = frozenset(term for topic in CHESS_TOPICS for term in tokenize(topic)) - {'chess'}
+RETRY_PENALTY = 2.0   # Priority lost per failed attempt, so retries queue behind fresh URLs
+ROBOTS_RETRY_SECONDS = 600.0   # A site whose robots.txt could not be read stays off limits this long
+
+
+def _parsed_robots(lines: List[str]) -> RobotFileParser:
+    parser = RobotFileParser()
+    parser.parse(lines)
+    return parser
+
+
+DISALLOW_ALL = _parsed_robots(["User-agent: *", "Disallow: /"])
+
+
+def crawl_domain(url: str) -> Optional[str]:
+    """The CHESS_DOMAINS entry a URL belongs to (subdomains included), or None"""
+    host = host_key(url)
+    for domain in CHESS_DOMAINS:
+        if host == domain or host.endswith('.' + domain):
+            return domain
+    return None
+
+
+def site_origin(url: str) -> str:
+    """scheme://host[:port] of a URL, which robots.txt and sitemaps are relative to"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def url_priority(url: str, depth: int) -> float:
+    """Higher for article-like paths that mention topic words, lower with depth"""
+    path = urlsplit(url).path
+    terms = set(tokenize(path.replace('-', ' ').replace('_', ' ')))
+    score = 2.0 * len(terms & TOPIC_TERMS)
+    if ARTICLE_PATH_RE.search(path):
+        score += 3.0
+    return score - depth
+
+
+def guess_topic(url: str) -> str:
+    """The chess topic sharing most words with the URL path, else the path's slug"""
+    path = urlsplit(url).path
+    terms = set(tokenize(path.replace('-', ' ').replace('_', ' ')))
+    best, best_overlap = None, 0
+    for topic in CHESS_TOPICS:
+        overlap = len(terms & (set(tokenize(topic)) - {'chess'}))
+        if overlap > best_overlap:
+            best, best_overlap = topic, overlap
+    if best:
+        return best
+    slug = path.rstrip('/').rsplit('/', 1)[-1].replace('-', ' ').replace('_', ' ')
+    return slug.strip() or "chess"
+
+
+class Frontier:
+    """
+    SQLite queue of URLs to crawl, ordered by priority. A URL is stored once
+    (by canonical form) with its depth; it moves queued -> done, or back to
+    queued at a lower priority after a failed attempt until max_attempts,
+    then to failed. Restarts pick up where the last run stopped.
+    """
+
+    def __init__(self, db_path: Path = CRAWL_FRONTIER_DB, max_size: int = CRAWL_FRONTIER_MAX,
+                 max_attempts: int = CRAWL_MAX_ATTEMPTS):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                host TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                priority REAL NOT NULL,
+                status TEXT NOT NULL,
+                added REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS frontier_queue ON frontier(status, priority);
+            -- Best queued URL per host without scanning other hosts' rows
+            CREATE INDEX IF NOT EXISTS frontier_host ON frontier(status, host, priority);
+            CREATE TABLE IF NOT EXISTS seeded (domain TEXT PRIMARY KEY, seeded_at REAL NOT NULL);
+        """)
+        # A crash mid-fetch leaves 'claimed' rows behind; give them another go
+        self._conn.execute("UPDATE frontier SET status = 'queued' WHERE status = 'claimed'")
+        self._conn.commit()
+
+    def add(self, urls: List[str], depth: int) -> int:
+        """Queue new URLs at a depth; returns how many were new"""
+        now = time.time()
+        rows = []
+        for url in urls:
+            rows.append((canonicalize_url(url), url, host_key(url), depth, url_priority(url, depth), now))
+        with self._lock:
+            added = self._conn.executemany(
+                "INSERT OR IGNORE INTO frontier (key, url, host, depth, priority, status, added) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?)", rows).rowcount
+            self._trim()
+            self._conn.commit()
+        return added
+
+    def _trim(self):
+        """Drop the lowest-priority queued URLs beyond max_size (caller holds the lock)"""
+        queued = self._conn.execute("SELECT COUNT(*) FROM frontier WHERE status = 'queued'").fetchone()[0]
+        if queued > self.max_size:
+            self._conn.execute("""
+                DELETE FROM frontier WHERE key IN (
+                    SELECT key FROM frontier WHERE status = 'queued'
+                    ORDER BY priority ASC, added DESC LIMIT ?)
+            """, (queued - self.max_size,))
+
+    def depth_of(self, url: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("SELECT depth FROM frontier WHERE key = ?",
+                                     (canonicalize_url(url),)).fetchone()
+        return row[0] if row else None
+
+    def claim(self, eligible) -> Optional[Tuple[str, int]]:
+        """
+        Highest-priority queued (url, depth) whose host passes `eligible(host)`.
+        Hosts are filtered before ranking, so a host at its page cap or in
+        backoff can never hide the other hosts' URLs.
+        """
+        with self._lock:
+            hosts = [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT host FROM frontier WHERE status = 'queued'")]
+        allowed = [host for host in hosts if eligible(host)]
+        if not allowed:
+            return None
+        placeholders = ', '.join('?' * len(allowed))
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT key, url, depth FROM frontier WHERE status = 'queued' AND host IN ({placeholders}) "
+                "ORDER BY priority DESC, added ASC LIMIT 1", allowed).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE frontier SET status = 'claimed' WHERE key = ?", (row[0],))
+            self._conn.commit()
+        return row[1], row[2]
+
+    def finish(self, url: str, status: str):
+        """
+        Record the outcome of a claimed URL: 'done', 'failed' or back to
+        'queued'. A failure re-queues the URL at a lower priority until it
+        has had max_attempts tries.
+        """
+        key = canonicalize_url(url)
+        with self._lock:
+            if status == 'failed':
+                self._conn.execute("""
+                    UPDATE frontier SET attempts = attempts + 1,
+                        status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'queued' END,
+                        priority = priority - ?
+                    WHERE key = ?""", (self.max_attempts, RETRY_PENALTY, key))
+            else:
+                self._conn.execute("UPDATE frontier SET status = ? WHERE key = ?", (status, key))
+            self._conn.commit()
+
+    def needs_seeding(self, domain: str, max_age_days: float = CRAWL_RESEED_DAYS) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT seeded_at FROM seeded WHERE domain = ?", (domain,)).fetchone()
+        return row is None or time.time() - row[0] > max_age_days * 86400
+
+    def mark_seeded(self, domain: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO seeded (domain, seeded_at) VALUES (?, ?)",
+                               (domain, time.time()))
+            self._conn.commit()
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Crawler:
+    """
+    Background worker that crawls the frontier while the store holds fewer
+    than CRAWL_TARGET_UNUSED unused items. Pages go through the searcher's
+    rate-limited, health-checked fetch path and are stored like search
+    results; their in-domain links feed back into the frontier.
+    """
+
+    def __init__(self, searcher, data_manager, frontier: Frontier = None,
+                 max_depth: int = CRAWL_MAX_DEPTH, max_pages: int = CRAWL_MAX_PAGES_PER_SESSION,
+                 max_pages_per_host: int = CRAWL_MAX_PAGES_PER_HOST,
+                 target_unused: int = CRAWL_TARGET_UNUSED):
+        self.searcher = searcher
+        self.data_manager = data_manager
+        self.frontier = frontier or Frontier()
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_pages_per_host = max_pages_per_host
+        self.target_unused = target_unused
+        self.running = False
+        self.thread = None
+        # origin -> (parser, or None to allow all; origin it redirected to; time to re-read it)
+        self._robots: Dict[str, Tuple[Optional[RobotFileParser], str, float]] = {}
+        self._lock = threading.Lock()   # add_links runs on the searcher's fetch threads
+        self._host_pages: Dict[str, int] = {}
+        self._last_host = None
+
+        # Statistics
+        self.pages_crawled = 0
+        self.content_added = 0
+        self.links_queued = 0
+
+        searcher.on_links = self.add_links
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._crawl_loop, daemon=True)
+        self.thread.start()
+        print("[Crawler] Started background crawl of chess domains")
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+        print("[Crawler] Stopped")
+
+    def _crawl_loop(self):
+        self.seed()
+        while self.running:
+            try:
+                if self.pages_crawled >= self.max_pages:
+                    print("[Crawler] Session page budget reached")
+                    break
+                if self.data_manager.count_unused() >= self.target_unused:
+                    time.sleep(CRAWL_IDLE_SECONDS)
+                    continue
+                if not self.crawl_one():
+                    time.sleep(CRAWL_IDLE_SECONDS)
+            except Exception as e:
+                print(f"[Crawler] Error: {e}")
+                time.sleep(3)
+
+    def _get_text(self, url: str) -> Optional[str]:
+        try:
+            response = self.searcher.downloader.fetch(url, allowed=('html', 'text'), timeout=15)
+        except Exception as e:
+            print(f"[Crawler] Could not read {url}: {e}")
+            return None
+        return response.text
+
+    def _robots_for(self, origin: str) -> Tuple[Optional[RobotFileParser], str]:
+        """
+        Parsed robots.txt of a site and the origin it redirected to. None
+        (allow all) when the site has none (4xx); when it could not be read
+        (5xx, network error) the site is disallowed for ROBOTS_RETRY_SECONDS.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._robots.get(origin)
+            if cached is not None and cached[2] > now:
+                return cached[0], cached[1]
+        # Fetched outside the lock; two threads may both fetch it, and the last answer is kept
+        parser, final, expires = DISALLOW_ALL, origin, now + ROBOTS_RETRY_SECONDS
+        try:
+            response = self.searcher.downloader.fetch(f"{origin}/robots.txt", allowed=('html', 'text'),
+                                                      timeout=15)
+            parser, final = _parsed_robots(response.text.splitlines()), site_origin(response.url)
+            expires = float('inf')
+        except requests.HTTPError as e:
+            if e.response is not None and 400 <= e.response.status_code < 500:
+                parser, final, expires = None, site_origin(e.response.url), float('inf')
+            else:
+                print(f"[Crawler] Could not read {origin}/robots.txt: {e}")
+        except Exception as e:
+            print(f"[Crawler] Could not read {origin}/robots.txt: {e}")
+        with self._lock:
+            self._robots[origin] = (parser, final, expires)
+        return parser, final
+
+    def allowed(self, url: str) -> bool:
+        """In a crawl domain, not an asset/account page, and permitted by its site's robots.txt"""
+        domain = crawl_domain(url)
+        if domain is None or not url.startswith(('http://', 'https://')):
+            return False
+        if SKIPPED_PATH_RE.search(urlsplit(url).path):
+            return False
+        robots, _ = self._robots_for(site_origin(url))
+        return robots is None or robots.can_fetch(USER_AGENT, url)
+
+    def seed(self):
+        """Queue sitemap URLs of every domain not seeded within CRAWL_RESEED_DAYS"""
+        for domain in CHESS_DOMAINS:
+            if not self.frontier.needs_seeding(domain):
+                continue
+            seed = f"https://{domain}"
+            if not self.searcher.host_health.is_available(f"{seed}/"):
+                continue
+            # The bare domain may redirect (e.g. to www.); sitemaps are read from where it lands
+            robots, root = self._robots_for(seed)
+            if robots is DISALLOW_ALL:
+                continue   # robots.txt unreadable; seeded on a later run
+            urls = self._sitemap_urls(robots, root)
+            added = self.frontier.add([u for u in urls if self.allowed(u)], depth=0)
+            self.frontier.mark_seeded(domain)
+            print(f"[Crawler] Seeded {added} URLs from {domain} sitemaps")
+
+    def _sitemap_urls(self, robots: Optional[RobotFileParser], root: str) -> List[str]:
+        """Page URLs from the sitemaps robots.txt lists (or /sitemap.xml), following one index level"""
+        root = f"{root}/"
+        sitemaps = [urljoin(root, s) for s in (robots.site_maps() or [])] if robots is not None else []
+        if not sitemaps:
+            sitemaps = [urljoin(root, "sitemap.xml")]
+
+        urls: List[str] = []
+        for sitemap in sitemaps[:CRAWL_SITEMAPS_PER_DOMAIN]:
+            text = self._get_text(sitemap)
+            if not text:
+                continue
+            locs = LOC_RE.findall(text)
+            if SITEMAP_INDEX_RE.search(text):
+                # Article/blog sitemaps first; compressed ones are not supported
+                children = sorted((loc for loc in locs if not loc.endswith('.gz')),
+                                  key=lambda loc: not ARTICLE_PATH_RE.search(loc))
+                for child in children[:CRAWL_SITEMAPS_PER_DOMAIN]:
+                    child_text = self._get_text(child)
+                    if child_text:
+                        urls.extend(LOC_RE.findall(child_text))
+                    if len(urls) >= CRAWL_SITEMAP_URLS:
+                        break
+            else:
+                urls.extend(locs)
+            if len(urls) >= CRAWL_SITEMAP_URLS:
+                break
+        return urls[:CRAWL_SITEMAP_URLS]
+
+    def add_links(self, page_url: str, hrefs: List[str]):
+        """Queue in-domain article links of a fetched page, one hop deeper than the page"""
+        domain = crawl_domain(page_url)
+        if domain is None:
+            return
+        depth = (self.frontier.depth_of(page_url) or 0) + 1
+        if depth > self.max_depth:
+            return
+        links = []
+        for href in hrefs:
+            url = urljoin(page_url, href.strip()).split('#', 1)[0]
+            if crawl_domain(url) == domain and self.allowed(url):
+                links.append(url)
+        if links:
+            added = self.frontier.add(links, depth)
+            with self._lock:
+                self.links_queued += added
+
+    def _eligible(self, host: str) -> bool:
+        if self._host_pages.get(host, 0) >= self.max_pages_per_host:
+            return False
+        return self.searcher.host_health.is_available(f"https://{host}/")
+
+    def crawl_one(self) -> bool:
+        """Fetch the best frontier URL; returns False when nothing is eligible"""
+        # Prefer a different host than last time so one slow host does not stall the crawl
+        claimed = self.frontier.claim(lambda host: host != self._last_host and self._eligible(host))
+        if claimed is None:
+            claimed = self.frontier.claim(self._eligible)
+        if claimed is None:
+            return False
+        url, depth = claimed
+        if self.searcher.url_store.is_fetched(canonicalize_url(url)):
+            self.frontier.finish(url, 'done')   # Already found through search
+            return True
+        host = host_key(url)
+        self._last_host = host
+        self._host_pages[host] = self._host_pages.get(host, 0) + 1
+        self.pages_crawled += 1
+
+        content = self.searcher.fetch_page(url, guess_topic(url))
+        # No content but a settled URL state (duplicate, rejected, too thin) is final;
+        # a download error or host backoff is worth another attempt later
+        settled = content or self.searcher.url_store.is_fetched(canonicalize_url(url))
+        self.frontier.finish(url, 'done' if settled else 'failed')
+        if content and self.data_manager.add_content(asdict(content)):
+            self.content_added += 1
+            print(f"[Crawler] + {content.title[:60]}")
+        return True
+
+    def get_stats(self) -> Dict:
+        return {
+            'pages_crawled': self.pages_crawled,
+            'content_added': self.content_added,
+            'links_queued': self.links_queued,
+            'frontier': self.frontier.get_statistics(),
+        }
@@ -4,20 +4,21 @@ Handles storage, retrieval, and organization of chess content
 Supports presentation queue system with continuous background generation
 """
 import json
-import os
 import random
 import threading
 import queue
-from pathlib import Path
-from typing import List, Dict, Optional, Generator
+from typing import List, Dict, Optional
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 import hashlib
 
-from config import (
-    DATA_DIR, CONTENT_DIR, IMAGES_DIR, PDFS_DIR,
-    PRESENTATIONS_DIR, CACHE_DIR
-)
+from config import PRESENTATIONS_DIR
+from image_catalog import get_image_catalog
+from content_store import ContentCache, get_content_store
+from text_index import get_text_index, content_text
+from content_pool import ContentPool
+from near_duplicates import get_near_duplicate_index
+from host_health import get_host_health
 
 
 @dataclass
@@ -47,6 +48,17 @@ class Lesson:
     status: str = "pending"  # pending, playing, completed
 
 
+@dataclass
+class ContentMeta:
+    """What lesson planning needs to know about a stored item without its body"""
+    id: str
+    topic: str
+    title: str
+    url: str
+    excerpt_count: int
+    image_count: int
+
+
 class PresentationQueue:
     """Thread-safe queue for managing lessons"""
 
@@ -104,76 +116,136 @@ class DataManager:
     """Manages all data storage and retrieval for the presentation system"""
 
     def __init__(self):
-        self.content_cache: Dict[str, dict] = {}
-        self.used_content_ids: set = set()  # Track which content has been used
+        self.content_index: Dict[str, ContentMeta] = {}   # Every usable item; bodies live in the store
+        self.pool = ContentPool()   # Unused items, with watch history across sessions
         self.presentation_queue = PresentationQueue()
+        self.store = get_content_store()
+        self.bodies = ContentCache(self.store)
+        self.images = get_image_catalog()   # Every stored image, kept current by the ingestor
+        self.text_index = get_text_index()
+        self.near_duplicates = get_near_duplicate_index()
+        self.near_duplicates_skipped = 0
         self._lock = threading.Lock()
         self._load_existing_content()
 
-    def _load_existing_content(self):
-        """Load previously fetched content from disk"""
-        for content_file in CONTENT_DIR.glob("*.json"):
-            try:
-                with open(content_file, 'r', encoding='utf-8') as f:
-                    content = json.load(f)
-                    self.content_cache[content['id']] = content
-            except Exception as e:
-                print(f"Error loading {content_file}: {e}")
+    @staticmethod
+    def _fingerprint_text(content: dict) -> str:
+        return content.get('text_content') or ' '.join(content.get('excerpts', []))
+
+    @staticmethod
+    def _meta(content: dict) -> ContentMeta:
+        return ContentMeta(
+            id=content['id'],
+            topic=content.get('topic') or '',
+            title=content.get('title') or '',
+            url=content.get('url') or '',
+            excerpt_count=content.get('excerpt_count', len(content.get('excerpts') or [])),
+            image_count=content.get('image_count', len(content.get('local_images') or [])),
+        )
 
-        print(f"Loaded {len(self.content_cache)} existing content items")
+    def _load_existing_content(self):
+        """Index stored content by metadata, oldest first, leaving out near-duplicates"""
+        for meta in self.store.iter_metadata():
+            content_id = meta['id']
+            # Fingerprints are persisted, so only bodies of new items are read here
+            if content_id not in self.near_duplicates:
+                content = self.store.get(content_id)
+                if content is None:
+                    continue
+                duplicate_of = self.near_duplicates.check_and_add(
+                    content_id, self._fingerprint_text(content), persist=False)
+                if duplicate_of:
+                    self.near_duplicates_skipped += 1
+                    continue
+            self.content_index[content_id] = self._meta(meta)
+        self.near_duplicates.retain(self.content_index)
+        self.near_duplicates.save()
+        # Items fingerprinted just now (e.g. migrated ones) are indexed, skipped ones dropped
+        self.text_index.sync(self.store, include=self.content_index.__contains__)
+        self.pool.load(self.content_index)
+
+        print(f"Loaded {len(self.content_index)} existing content items")
+        if self.near_duplicates_skipped:
+            print(f"Skipped {self.near_duplicates_skipped} near-duplicate content items")
+
+    def get_content(self, content_id: str) -> Optional[dict]:
+        """Full content item, loaded on demand through the LRU body cache"""
+        return self.bodies.get(content_id)
 
     def get_all_images(self) -> List[str]:
-        """Get all available image paths"""
-        images = []
-        if IMAGES_DIR.exists():
-            for topic_dir in IMAGES_DIR.iterdir():
-                if topic_dir.is_dir():
-                    for img_file in topic_dir.glob("*"):
-                        if img_file.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
-                            images.append(str(img_file))
-        return images
+        """Get all available image paths (one per group of near-duplicates)"""
+        return self.images.distinct_paths()
 
     def get_images_for_topic(self, topic: str) -> List[str]:
         """Get images for a specific topic"""
-        topic_dir = IMAGES_DIR / topic.replace(' ', '_')[:30]
-        if topic_dir.exists():
-            return [str(f) for f in topic_dir.glob("*")
-                    if f.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.webp']]
-        return []
+        return self.images.images_for_topic(topic)
 
     def get_unused_content(self) -> Optional[dict]:
-        """Get content that hasn't been used in a presentation yet"""
-        with self._lock:
-            unused = [c for cid, c in self.content_cache.items()
-                      if cid not in self.used_content_ids]
-            if unused:
-                content = random.choice(unused)
-                self.used_content_ids.add(content['id'])
-                return content
-            # If all content used, reset and start over
-            if self.content_cache:
-                self.used_content_ids.clear()
-                content = random.choice(list(self.content_cache.values()))
-                self.used_content_ids.add(content['id'])
+        """Get content that hasn't been shown yet (or, failing that, the least recently shown)"""
+        for _ in range(3):
+            content_id = self.pool.draw()
+            if content_id is None:
+                return None
+            content = self.get_content(content_id)
+            if content:
                 return content
         return None
 
+    def select_content(self, topic: str, k: int = 2, exclude_used: bool = True) -> List[dict]:
+        """
+        The k stored items that best match a topic (BM25 over title, topic and
+        excerpts), marked as used. Only the postings of the topic's words are
+        scored, so the cost does not grow with the whole corpus.
+        """
+        def accept(content_id: str) -> bool:
+            return content_id in self.content_index and (
+                not exclude_used or self.pool.is_fresh(content_id))
+
+        selected = []
+        for content_id, _ in self.text_index.search(topic, k=k, accept=accept):
+            content = self.get_content(content_id)
+            if content:
+                selected.append(content)
+                self.pool.mark_watched(content_id)
+        return selected
+
+    def is_unused(self, content_id: str) -> bool:
+        return self.pool.is_fresh(content_id)
+
+    def mark_used(self, content_id: str):
+        """Record an item put into a lesson by the caller (not drawn or selected here)"""
+        self.pool.mark_watched(content_id)
+
+    def count_unused(self) -> int:
+        """Number of stored items not yet used in a lesson"""
+        return self.pool.fresh_count()
+
     def get_random_content(self) -> Optional[dict]:
         """Get a random content item"""
-        if self.content_cache:
-            return random.choice(list(self.content_cache.values()))
+        if self.content_index:
+            return self.get_content(random.choice(list(self.content_index)))
         return None
 
-    def add_content(self, content_dict: dict):
-        """Add new content to the cache"""
+    def add_content(self, content_dict: dict) -> bool:
+        """Add new content to the cache; returns False if it was rejected as a near-duplicate"""
         content_id = content_dict.get('id')
-        if content_id:
+        if not content_id:
+            return False
+        duplicate_of = self.near_duplicates.check_and_add(content_id, self._fingerprint_text(content_dict))
+        if duplicate_of:
             with self._lock:
-                self.content_cache[content_id] = content_dict
-            # Save to disk
-            content_file = CONTENT_DIR / f"{content_id}.json"
-            with open(content_file, 'w', encoding='utf-8') as f:
-                json.dump(content_dict, f, indent=2, ensure_ascii=False)
+                self.near_duplicates_skipped += 1
+            print(f"Rejected near-duplicate content {content_id} (matches {duplicate_of})")
+            return False
+        if not self.bodies.remember(content_dict):   # The searcher has normally stored it already
+            self.bodies.put(content_dict)
+        with self._lock:
+            self.content_index[content_id] = self._meta(content_dict)
+        self.pool.add(content_id)
+        if content_id not in self.text_index:
+            self.text_index.add(content_id, *content_text(content_dict))
+            self.text_index.flush()
+        return True
 
     def create_slides_from_content(self, content_dict: dict) -> List[Slide]:
         """Create presentation slides from content"""
@@ -183,7 +255,7 @@ class DataManager:
         topic = content_dict.get('topic', 'chess')
         url = content_dict.get('url', '')
         excerpts = content_dict.get('excerpts', [])
-        images = content_dict.get('local_images', [])
+        images = self.images.distinct(content_dict.get('local_images', []))   # One of each near-duplicate group
 
         # Title slide
         slides.append(Slide(
@@ -334,13 +406,18 @@ class DataManager:
     def get_statistics(self) -> Dict:
         """Get statistics about stored data"""
         return {
-            'total_content_items': len(self.content_cache),
-            'total_images': len(self.get_all_images()),
-            'unused_content': len(self.content_cache) - len(self.used_content_ids),
+            'total_content_items': len(self.content_index),
+            'total_images': len(self.images),
+            'unused_content': self.count_unused(),
             'queue_size': self.presentation_queue.size,
             'lessons_played': self.presentation_queue.lessons_played,
-            'topics': list(set(c.get('topic', '') for c in self.content_cache.values())),
-            'lessons_saved': len(list(PRESENTATIONS_DIR.glob("lesson_*.json")))
+            'topics': list(set(meta.topic for meta in self.content_index.values())),
+            'lessons_saved': len(list(PRESENTATIONS_DIR.glob("lesson_*.json"))),
+            'near_duplicates_skipped': self.near_duplicates_skipped,
+            'content_cache': self.bodies.get_statistics(),
+            'content_pool': self.pool.get_statistics(),
+            'image_catalog': self.images.get_statistics(),
+            'host_health': get_host_health().get_statistics()
         }
 
 
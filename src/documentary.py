@@ -88,7 +88,7 @@ class DocumentaryEngine:
         print("\n=== Loading Initial Content ===")
 
         # Check for cached content
-        cached = len(self.data_manager.content_cache)
+        cached = len(self.data_manager.content_index)
         print(f"Found {cached} cached content items")
 
         # Fetch some fresh content
@@ -160,6 +160,15 @@ class DocumentaryEngine:
         print("\n[Documentary] Shutting down...")
         self.running = False
 
+        # Persist batched index writes, as ChessMaster.stop does
+        self.searcher.http_cache.flush()
+        self.searcher.images.flush()
+        self.searcher.near_duplicates.flush()
+        if self.searcher.archive is not None:
+            self.searcher.archive.flush()
+        self.data_manager.text_index.flush(force=True)
+        self.data_manager.images.save()
+
         stats = self.data_manager.get_statistics()
         print(f"""
 === Session Statistics ===
@@ -0,0 +1,169 @@
+"""
+Streaming Downloader
+Size-capped streamed GETs that abort early on disallowed or oversized
+resources, judged from headers and magic bytes
+"""
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import DOWNLOAD_BYTE_CAPS, DOWNLOAD_HEAD_PREFLIGHT, DOWNLOAD_CHUNK_SIZE
+
+# Kinds that may be cut off at the cap and still be useful
+TRUNCATABLE_KINDS = ('html', 'text')
+
+PAGE_KINDS = ('html', 'text', 'pdf')
+IMAGE_KINDS = ('image',)
+
+
+class DownloadRejected(Exception):
+    """The resource was skipped because of its type or size"""
+
+
+@dataclass
+class Download:
+    """A fully read (possibly truncated) response body"""
+    url: str                      # final URL after redirects
+    status_code: int
+    headers: CaseInsensitiveDict
+    content: bytes
+    kind: str                     # 'html', 'text', 'pdf', 'image'
+    encoding: Optional[str] = None
+    truncated: bool = False
+    limiter_wait: float = 0.0
+    from_cache: bool = False
+
+    @cached_property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+def kind_from_content_type(content_type: str) -> str:
+    """Map a Content-Type header to a download kind"""
+    content_type = content_type.lower()
+    if 'application/pdf' in content_type:
+        return 'pdf'
+    if content_type.startswith('image/'):
+        return 'image'
+    if 'text/plain' in content_type:
+        return 'text'
+    if not content_type or 'html' in content_type or 'xml' in content_type:
+        return 'html'
+    return 'other'
+
+
+def sniff_kind(head: bytes) -> Optional[str]:
+    """Identify binary formats from their leading magic bytes"""
+    if head.startswith(b'%PDF'):
+        return 'pdf'
+    if (head.startswith(b'\x89PNG') or head.startswith(b'\xff\xd8\xff')
+            or head.startswith(b'GIF8') or (head[:4] == b'RIFF' and head[8:12] == b'WEBP')):
+        return 'image'
+    if head.startswith(b'PK\x03\x04') or head.startswith(b'\x1f\x8b'):
+        return 'other'  # archives
+    return None
+
+
+class Downloader:
+    """
+    Streams bodies through `get` (a rate-limited session.get) and enforces
+    per-kind byte caps. HTML/text are truncated at the cap; PDFs and
+    images over the cap are abandoned as soon as that is known.
+    """
+
+    def __init__(self, get: Callable[..., requests.Response],
+                 head: Callable[..., requests.Response] = None, http_cache=None,
+                 caps: Dict[str, int] = None, head_preflight: bool = DOWNLOAD_HEAD_PREFLIGHT,
+                 host_health=None):
+        self._get = get
+        self._head = head
+        self.http_cache = http_cache
+        self.host_health = host_health
+        self.caps = dict(DOWNLOAD_BYTE_CAPS if caps is None else caps)
+        self.head_preflight = head_preflight and head is not None
+        self.rejected = 0
+
+    def _check(self, url: str, kind: str, length: Optional[str], allowed: Tuple[str, ...]):
+        """Reject by kind or declared length before reading any body"""
+        if kind not in allowed:
+            self.rejected += 1
+            raise DownloadRejected(f"{kind} not allowed for {url}")
+        if length and length.isdigit() and kind not in TRUNCATABLE_KINDS \
+                and int(length) > self.caps.get(kind, 0):
+            self.rejected += 1
+            raise DownloadRejected(f"{kind} of {int(length)} bytes exceeds cap for {url}")
+
+    def fetch(self, url: str, allowed: Tuple[str, ...] = PAGE_KINDS, timeout=15) -> Download:
+        """
+        Download a URL, raising DownloadRejected or requests errors on failure.
+        Hosts in a backoff window raise HostBackoff without being contacted.
+        """
+        if self.host_health is None:
+            return self._fetch(url, allowed, timeout)
+        self.host_health.check(url)
+        try:
+            return self._fetch(url, allowed, timeout)
+        except requests.RequestException as e:
+            self.host_health.record_failure(url, e)
+            raise
+
+    def _fetch(self, url: str, allowed: Tuple[str, ...], timeout) -> Download:
+        if self.head_preflight:
+            try:
+                head = self._head(url, timeout=timeout, allow_redirects=True)
+                if head.ok:
+                    head_type = head.headers.get('content-type', '')
+                    if head_type:
+                        self._check(url, kind_from_content_type(head_type),
+                                    head.headers.get('content-length'), allowed)
+            except requests.RequestException:
+                pass  # Servers that mishandle HEAD still get a GET
+
+        response = self._get(url, timeout=timeout, stream=True)
+        with response:
+            response.raise_for_status()
+            if self.host_health is not None:
+                self.host_health.record_success(url)
+            kind = kind_from_content_type(response.headers.get('content-type', ''))
+            self._check(url, kind, response.headers.get('content-length'), allowed)
+
+            cap = self.caps.get(kind, 0)
+            chunks = []
+            size = 0
+            truncated = False
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                if not chunks:
+                    # The declared type can lie; trust the magic bytes
+                    sniffed = sniff_kind(chunk[:16])
+                    if sniffed and sniffed != kind:
+                        kind = sniffed
+                        self._check(url, kind, None, allowed)
+                        cap = self.caps.get(kind, 0)
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > cap:
+                    if kind not in TRUNCATABLE_KINDS:
+                        self.rejected += 1
+                        raise DownloadRejected(f"{kind} larger than {cap} bytes: {url}")
+                    truncated = True
+                    break
+
+            body = b''.join(chunks)[:cap]
+            from_cache = getattr(response, 'from_cache', False)
+            if self.http_cache is not None and not truncated and not from_cache:
+                self.http_cache.store(response, body)
+
+            return Download(
+                url=response.url,
+                status_code=response.status_code,
+                headers=response.headers,
+                content=body,
+                kind=kind,
+                encoding=response.encoding,
+                truncated=truncated,
+                limiter_wait=getattr(response, 'limiter_wait', 0.0),
+                from_cache=from_cache,
+            )
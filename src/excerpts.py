@@ -0,0 +1,127 @@
+"""
+Excerpt Engine
+Picks the most chess-relevant passages from a document using a
+precompiled keyword matcher, a density/length score and top-k selection
+"""
+import heapq
+import re
+from typing import Dict, Iterable, List, Optional
+
+CHESS_KEYWORDS = [
+    'chess', 'piece', 'pawn', 'knight', 'bishop', 'rook', 'queen', 'king',
+    'move', 'checkmate', 'opening', 'endgame', 'tactic', 'strategy',
+    'position', 'attack', 'defense', 'castle', 'gambit', 'sacrifice',
+]
+
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex alternation shaped like a trie, so matching never backtracks across words"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end of word
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        optional = '' in node
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 and not optional else f"(?:{'|'.join(branches)})"
+        return f"{body}?" if optional else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Single-pass multi-keyword matcher. Keywords match at the start of a
+    word and may carry a suffix ("pawns", "attacking"), but not mid-word
+    ("remove" does not match "move").
+    """
+
+    def __init__(self, keywords: Iterable[str] = CHESS_KEYWORDS):
+        words = sorted({kw.lower() for kw in keywords if kw})
+        self._pattern = re.compile(r'\b(?:' + _trie_pattern(words) + ')', re.IGNORECASE)
+
+    def find(self, text: str) -> List[str]:
+        """All keyword occurrences in the text, lower-cased"""
+        return [m.group(0).lower() for m in self._pattern.finditer(text)]
+
+    def matches(self, text: str) -> bool:
+        return self._pattern.search(text) is not None
+
+
+def split_passages(text: str, max_length: int = 1000) -> List[str]:
+    """
+    Split plain text into paragraph-sized passages: blank-line separated
+    blocks, with over-long blocks broken at sentence boundaries.
+    """
+    passages = []
+    for block in re.split(r'\n\s*\n', text):
+        block = ' '.join(block.split())
+        if len(block) <= max_length:
+            passages.append(block)
+            continue
+        current = ''
+        for sentence in SENTENCE_END_RE.split(block):
+            if current and len(current) + len(sentence) + 1 > max_length:
+                passages.append(current)
+                current = ''
+            current = f"{current} {sentence}" if current else sentence[:max_length]
+        if current:
+            passages.append(current)
+    return passages
+
+
+class ExcerptEngine:
+    """Scores candidate passages and keeps the k best, in document order"""
+
+    def __init__(self, matcher: KeywordMatcher = None, min_length: int = 50,
+                 max_length: Optional[int] = 1000, max_filler: int = 3):
+        self.matcher = matcher or KeywordMatcher()
+        self.min_length = min_length
+        self.max_length = max_length
+        self.max_filler = max_filler  # Keyword-free passages kept, earliest first
+
+    def score(self, text: str) -> float:
+        """
+        Keyword-bearing passages always outrank keyword-free ones. Among
+        them, more distinct keywords and higher keyword density win, with
+        a small bonus for length up to ~400 characters.
+        """
+        length_factor = min(len(text), 400) / 400
+        hits = self.matcher.find(text)
+        if not hits:
+            return 0.1 * length_factor
+        density = len(hits) / max(1, len(text.split()))
+        return 1.0 + len(set(hits)) + 10.0 * density + length_factor
+
+    def select(self, candidates: Iterable[str], k: int = 10) -> List[str]:
+        """Top-k passages by score (ties favour earlier ones), returned in document order"""
+        seen = set()
+        scored = []
+        fillers = 0
+        for index, text in enumerate(candidates):
+            if len(text) <= self.min_length or (self.max_length and len(text) > self.max_length):
+                continue
+            if text in seen:
+                continue  # e.g. <li><p>..</p></li> yields the same text twice
+            seen.add(text)
+            score = self.score(text)
+            if score < 1.0:
+                if fillers >= self.max_filler:
+                    continue
+                fillers += 1
+            scored.append((score, -index, text))
+
+        best = heapq.nlargest(k, scored)
+        best.sort(key=lambda item: -item[1])
+        return [text for _, _, text in best]
+
+
+# Shared default engine; matchers are immutable so this is thread-safe
+default_engine = ExcerptEngine()
@@ -0,0 +1,363 @@
+"""
+HTML Extraction Backends
+Turns a fetched page into title, main text, candidate paragraphs,
+image sources and links. The main content is the block with the best text and
+link density, found by a readability-style scorer in one document walk.
+The lxml backend then gathers everything in a single walk of that block;
+the BeautifulSoup backend is the pure-Python fallback.
+"""
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from bs4 import BeautifulSoup, CData, NavigableString
+
+try:
+    import lxml.html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+from config import MAX_CONTENT_LENGTH, MAX_IMAGES_PER_TOPIC, HTML_EXTRACTION_BACKEND
+
+REMOVED_TAGS = ('script', 'style', 'nav', 'footer', 'header', 'aside', 'form', 'iframe')
+PARAGRAPH_TAGS = ('p', 'li', 'h2', 'h3')
+CONTENT_CLASS_RE = re.compile(r'content|article|post|entry')
+MULTI_NEWLINE_RE = re.compile(r'\n{3,}')
+BODY_TAG_RE = re.compile(r'<body[\s>]', re.IGNORECASE)
+
+# Main-content scoring (readability-style)
+SCORED_TAGS = ('p', 'pre', 'td', 'blockquote', 'li')
+CANDIDATE_WEIGHTS = {
+    'main': 10, 'article': 10, 'section': 5, 'div': 5,
+    'td': 3, 'pre': 3, 'blockquote': 3, 'body': 0,
+}
+POSITIVE_CLASS_RE = re.compile(r'article|body|content|entry|main|page|post|text|blog|story', re.IGNORECASE)
+NEGATIVE_CLASS_RE = re.compile(
+    r'comment|meta|footer|footnote|sidebar|sponsor|share|related|promo|banner|menu|nav|'
+    r'breadcrumb|pagination|social|widget|subscribe|signup|login|cookie|modal|popup',
+    re.IGNORECASE)
+CLASS_WEIGHT = 25
+MIN_PARAGRAPH_LENGTH = 25     # Shorter blocks are captions, buttons and labels
+MIN_MAIN_LENGTH = 200         # Best block must hold at least this much text
+MAX_LINKS = 200               # <a href> values kept per page
+
+
+@dataclass
+class ExtractedPage:
+    """Backend-neutral result of parsing one HTML page"""
+    title: Optional[str]     # None when the page has no <title>
+    text_content: str        # Main-content text; at least MAX_CONTENT_LENGTH chars if cut short
+    paragraphs: List[str] = field(default_factory=list)   # p/li/h2/h3 texts in document order
+    image_srcs: List[str] = field(default_factory=list)   # <img src> values in main content
+    link_hrefs: List[str] = field(default_factory=list)   # <a href> values in main content
+
+
+class _Block:
+    """Running totals for one open element during scoring"""
+    __slots__ = ('el', 'tag', 'weight', 'text', 'links', 'commas', 'score')
+
+    def __init__(self, el, tag: str, weight: Optional[int]):
+        self.el = el
+        self.tag = tag
+        self.weight = weight    # None unless the element may be the main content
+        self.text = 0           # Characters of stripped text inside
+        self.links = 0          # ... of which inside <a>
+        self.commas = 0
+        self.score = 0.0        # Points from scored paragraphs below it
+
+
+class BlockScorer:
+    """
+    Finds the main-content element from start/text/end events of one
+    document walk. Each paragraph-like block of real text gives points to
+    its parent and half to its grandparent (more for commas and length,
+    less for links). A candidate's final score adds a tag and class/id
+    weight and is scaled by (1 - link density), so navigation, listings
+    and footers lose to the prose block.
+    """
+
+    def __init__(self):
+        self._stack: List[_Block] = []
+        self._link_depth = 0
+        self.best = None
+        self.best_score = 0.0
+
+    def start(self, el, tag: str, class_id: str = ''):
+        weight = CANDIDATE_WEIGHTS.get(tag)
+        if weight is not None and class_id:
+            if NEGATIVE_CLASS_RE.search(class_id):
+                weight -= CLASS_WEIGHT
+            if POSITIVE_CLASS_RE.search(class_id):
+                weight += CLASS_WEIGHT
+        self._stack.append(_Block(el, tag, weight))
+        if tag == 'a':
+            self._link_depth += 1
+
+    def text(self, raw: str):
+        if not self._stack:
+            return
+        stripped = raw.strip()
+        if stripped:
+            block = self._stack[-1]
+            block.text += len(stripped)
+            block.commas += stripped.count(',')
+            if self._link_depth:
+                block.links += len(stripped)
+
+    def end(self):
+        block = self._stack.pop()
+        if block.tag == 'a':
+            self._link_depth -= 1
+        link_density = block.links / block.text if block.text else 0.0
+
+        if block.tag in SCORED_TAGS and block.text >= MIN_PARAGRAPH_LENGTH and self._stack:
+            points = (1 + block.commas + min(3, block.text // 100)) * (1 - link_density)
+            self._stack[-1].score += points
+            if len(self._stack) > 1:
+                self._stack[-2].score += points / 2
+
+        if block.weight is not None and block.score > 0 and block.text >= MIN_MAIN_LENGTH:
+            final = (block.score + block.weight) * (1 - link_density)
+            if final > self.best_score:
+                self.best, self.best_score = block.el, final
+
+        if self._stack:
+            parent = self._stack[-1]
+            parent.text += block.text
+            parent.links += block.links
+            parent.commas += block.commas
+
+
+def _class_id(attrs) -> str:
+    """Class and id attributes as one string for the class regexes"""
+    cls = attrs.get('class') or ''
+    if not isinstance(cls, str):
+        cls = ' '.join(cls)  # bs4 splits class into a list
+    return f"{cls} {attrs.get('id') or ''}".strip()
+
+
+class ExtractionBackend(ABC):
+    """Interface for HTML extraction implementations"""
+    name = "base"
+
+    @abstractmethod
+    def extract(self, html: str) -> ExtractedPage:
+        """Title, main text, paragraphs, images and links of one page"""
+
+
+class BeautifulSoupBackend(ExtractionBackend):
+    """Pure-Python html.parser tree with separate passes (reference behaviour)"""
+    name = "bs4"
+
+    def extract(self, html: str) -> ExtractedPage:
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Remove unwanted elements
+        for tag in soup(list(REMOVED_TAGS)):
+            tag.decompose()
+
+        title = None
+        if soup.title:
+            title = soup.title.string or ''
+
+        # Extract main content
+        main_content = self._score_blocks(soup)
+        if main_content is None:
+            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=CONTENT_CLASS_RE)
+        if not main_content:
+            main_content = soup.body or soup
+
+        # Get text content
+        text_content = main_content.get_text(separator='\n', strip=True)
+        text_content = MULTI_NEWLINE_RE.sub('\n\n', text_content)  # Reduce multiple newlines
+
+        paragraphs = [p.get_text(strip=True) for p in main_content.find_all(list(PARAGRAPH_TAGS))]
+        image_srcs = [img['src'] for img in main_content.find_all('img', src=True)[:MAX_IMAGES_PER_TOPIC]]
+        link_hrefs = [a['href'] for a in main_content.find_all('a', href=True)[:MAX_LINKS]]
+
+        return ExtractedPage(title, text_content, paragraphs, image_srcs, link_hrefs)
+
+    @staticmethod
+    def _score_blocks(soup):
+        """Best-scoring main-content element, or None if nothing qualifies"""
+        scorer = BlockScorer()
+        stack = [(soup, True)]
+        while stack:
+            node, entering = stack.pop()
+            if isinstance(node, NavigableString):
+                if type(node) in (NavigableString, CData):
+                    scorer.text(node)
+                continue
+            if not entering:
+                scorer.end()
+                continue
+            scorer.start(node, node.name, _class_id(node.attrs))
+            stack.append((node, False))
+            stack.extend((child, True) for child in reversed(node.contents))
+        return scorer.best
+
+
+class LxmlBackend(ExtractionBackend):
+    """
+    libxml2 parser plus one iterative walk of the main content that gathers
+    text, paragraphs, images and links together. Text collection stops once
+    MAX_CONTENT_LENGTH is reached; output matches BeautifulSoupBackend.
+    """
+    name = "lxml"
+
+    def __init__(self, max_length: int = MAX_CONTENT_LENGTH):
+        self.max_length = max_length
+
+    def extract(self, html: str) -> ExtractedPage:
+        root = lxml.html.document_fromstring(html)
+
+        # Removed tags are skipped rather than dropped from the tree:
+        # drop_tree() would merge their tail into the previous string
+        title = None
+        title_el = self._first(root.iter('title'))
+        if title_el is not None:
+            title = title_el.text if len(title_el) == 0 and title_el.text else ''
+
+        main = self._find_main(root, html)
+        text_parts, paragraphs, image_srcs, link_hrefs = self._walk(main)
+        return ExtractedPage(title, '\n'.join(text_parts), paragraphs, image_srcs, link_hrefs)
+
+    @staticmethod
+    def _first(elements):
+        """First element not inside a removed tag"""
+        for el in elements:
+            if not any(a.tag in REMOVED_TAGS for a in el.iterancestors()):
+                return el
+        return None
+
+    def _find_main(self, root, html: str):
+        """Best-scoring block, else <main>, <article> or a content-like <div>"""
+        best = self._score_blocks(root)
+        if best is not None:
+            return best
+        for tag in ('main', 'article'):
+            el = self._first(root.iter(tag))
+            if el is not None:
+                return el
+        # bs4 tests each class token; the pattern has no spaces, so
+        # searching the whole attribute is equivalent
+        el = self._first(div for div in root.iter('div')
+                         if CONTENT_CLASS_RE.search(div.get('class') or ''))
+        if el is not None:
+            return el
+        # html.parser only has a <body> when the document wrote one
+        body = root.find('body')
+        return body if body is not None and BODY_TAG_RE.search(html) else root
+
+    @staticmethod
+    def _score_blocks(root):
+        """Best-scoring main-content element, or None if nothing qualifies"""
+        scorer = BlockScorer()
+        stack = [(root, True)]
+        while stack:
+            el, entering = stack.pop()
+            tag = el.tag
+            if not isinstance(tag, str) or tag in REMOVED_TAGS:
+                # Comments and removed tags only contribute their tail
+                if el.tail and el is not root:
+                    scorer.text(el.tail)
+                continue
+            if entering:
+                scorer.start(el, tag, _class_id(el.attrib))
+                if el.text:
+                    scorer.text(el.text)
+                stack.append((el, False))
+                stack.extend((child, True) for child in reversed(el))
+            else:
+                scorer.end()
+                if el.tail and el is not root:
+                    scorer.text(el.tail)
+        return scorer.best
+
+    def _walk(self, main):
+        text_parts: List[str] = []
+        text_length = -1            # Accounts for the separator before the first part
+        text_full = False
+        paragraphs: List[str] = []
+        open_paragraphs: List[List[str]] = []   # Parts of each unclosed paragraph
+        open_slots: List[int] = []              # Their index in `paragraphs` (start-tag order)
+        image_srcs: List[str] = []
+        link_hrefs: List[str] = []
+
+        def emit(raw: str):
+            nonlocal text_length, text_full
+            stripped = raw.strip()
+            if not stripped:
+                return
+            for parts in open_paragraphs:
+                parts.append(stripped)
+            if not text_full:
+                # Parts are stripped, so newline runs never span two parts
+                part = MULTI_NEWLINE_RE.sub('\n\n', stripped)
+                text_parts.append(part)
+                text_length += len(part) + 1
+                text_full = text_length >= self.max_length
+
+        stack = [(main, True)]
+        while stack:
+            el, entering = stack.pop()
+            tag = el.tag
+            if not isinstance(tag, str):
+                # Comment / processing instruction: only its tail is content
+                if el is not main and el.tail:
+                    emit(el.tail)
+                continue
+
+            if tag in REMOVED_TAGS and el is not main:
+                if el.tail:
+                    emit(el.tail)
+                continue
+
+            if entering:
+                if tag in PARAGRAPH_TAGS and el is not main:
+                    open_slots.append(len(paragraphs))
+                    paragraphs.append('')
+                    open_paragraphs.append([])
+                elif tag == 'img' and len(image_srcs) < MAX_IMAGES_PER_TOPIC:
+                    src = el.get('src')
+                    if src is not None:
+                        image_srcs.append(src)
+                elif tag == 'a' and len(link_hrefs) < MAX_LINKS:
+                    href = el.get('href')
+                    if href is not None:
+                        link_hrefs.append(href)
+                if el.text:
+                    emit(el.text)
+                stack.append((el, False))
+                stack.extend((child, True) for child in reversed(el))
+            else:
+                if tag in PARAGRAPH_TAGS and el is not main:
+                    paragraphs[open_slots.pop()] = ''.join(open_paragraphs.pop())
+                if el is not main and el.tail:
+                    emit(el.tail)
+
+        return text_parts, paragraphs, image_srcs, link_hrefs
+
+
+class HTMLExtractor:
+    """Runs the configured backend, falling back to BeautifulSoup on failure"""
+
+    def __init__(self, backend: str = HTML_EXTRACTION_BACKEND):
+        self.fallback = BeautifulSoupBackend()
+        if backend == 'bs4' or (backend == 'auto' and not HAS_LXML):
+            self.backend = self.fallback
+        elif HAS_LXML:
+            self.backend = LxmlBackend()
+        else:
+            print("lxml not installed, using BeautifulSoup for HTML extraction")
+            self.backend = self.fallback
+
+    def extract(self, html: str) -> ExtractedPage:
+        if self.backend is not self.fallback:
+            try:
+                return self.backend.extract(html)
+            except Exception as e:
+                print(f"{self.backend.name} extraction failed, using bs4: {e}")
+        return self.fallback.extract(html)
@@ -0,0 +1,85 @@
+"""
+Multi-Index Hashing
+Hamming-distance lookup over fixed-width bit hashes, shared by the SimHash
+near-duplicate index and the perceptual image hashes
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class HashIndex:
+    """
+    The hash bits are split into bands (max_distance + 1 by default), and
+    any two hashes within max_distance bits agree exactly on at least one
+    band. Candidates come from the band buckets and are then checked by
+    full distance, so a query touches a handful of entries instead of
+    every stored hash.
+    """
+
+    def __init__(self, bits: int, max_distance: int, num_bands: int = None):
+        self.bits = bits
+        self.max_distance = max_distance
+        self.num_bands = num_bands or max_distance + 1
+        # (shift, mask) per band; widths differ by at most one bit
+        self._band_layout = []
+        shift = 0
+        for band in range(self.num_bands):
+            width = (bits + band) // self.num_bands
+            self._band_layout.append((shift, (1 << width) - 1))
+            shift += width
+        self._hashes: Dict[str, int] = {}
+        self._buckets: List[Dict[int, List[str]]] = [{} for _ in range(self.num_bands)]
+
+    def _bands(self, value: int):
+        for band, (shift, mask) in enumerate(self._band_layout):
+            yield band, (value >> shift) & mask
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._hashes
+
+    def get(self, key: str) -> Optional[int]:
+        return self._hashes.get(key)
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        return iter(self._hashes.items())
+
+    def add(self, value: int, key: str):
+        """Store (or replace) the hash for a key"""
+        self.remove(key)
+        self._hashes[key] = value
+        for band, bucket_key in self._bands(value):
+            self._buckets[band].setdefault(bucket_key, []).append(key)
+
+    def remove(self, key: str) -> bool:
+        value = self._hashes.pop(key, None)
+        if value is None:
+            return False
+        for band, bucket_key in self._bands(value):
+            bucket = self._buckets[band][bucket_key]
+            bucket.remove(key)
+            if not bucket:
+                del self._buckets[band][bucket_key]
+        return True
+
+    def search(self, value: int) -> List[Tuple[int, str]]:
+        """(distance, key) for every key within max_distance bits, nearest first"""
+        found = {}
+        for band, bucket_key in self._bands(value):
+            for key in self._buckets[band].get(bucket_key, ()):
+                if key not in found:
+                    found[key] = hamming_distance(value, self._hashes[key])
+        return sorted((distance, key) for key, distance in found.items()
+                      if distance <= self.max_distance)
+
+    def nearest(self, value: int, exclude: str = None) -> Optional[str]:
+        """Closest key within max_distance, other than `exclude`"""
+        for _, key in self.search(value):
+            if key != exclude:
+                return key
+        return None
@@ -0,0 +1,176 @@
+"""
+Host Health Tracker
+Per-domain negative cache: hosts that time out, refuse connections or
+answer 403/429/5xx are skipped for an exponentially growing backoff window
+"""
+import json
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+from config import HOST_HEALTH_FILE, HOST_BACKOFF_BASE, HOST_BACKOFF_MAX
+from rate_limiter import host_key
+
+# Backoff multiplier per failure kind; a 403 rarely clears up quickly
+FAILURE_FACTORS = {
+    'timeout': 1,
+    'connection': 1,
+    'server_error': 1,
+    'rate_limited': 1,
+    'forbidden': 4,
+}
+
+
+class HostBackoff(Exception):
+    """The host is in a backoff window and was not contacted"""
+
+
+def classify_failure(error: Exception) -> Optional[str]:
+    """Failure kind for a request error, or None if it says nothing about the host"""
+    if isinstance(error, requests.Timeout):
+        return 'timeout'
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else 0
+        if status == 403:
+            return 'forbidden'
+        if status == 429:
+            return 'rate_limited'
+        if status >= 500:
+            return 'server_error'
+        return None  # 404 and friends are about the page, not the host
+    if isinstance(error, requests.ConnectionError):
+        return 'connection'
+    return None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header (delta or HTTP date), if present"""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostHealth:
+    """
+    Tracks consecutive failures per host. Each failure doubles the backoff
+    (base * factor * 2^(n-1), capped); a success clears it. State survives
+    restarts so a dead host is not retried on every launch.
+    """
+
+    def __init__(self, state_file: Path = HOST_HEALTH_FILE, base: float = HOST_BACKOFF_BASE,
+                 max_backoff: float = HOST_BACKOFF_MAX):
+        self.state_file = Path(state_file)
+        self.base = base
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, dict] = {}
+        self.skipped = 0
+        self._load()
+
+    def _load(self):
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self._hosts = json.load(f)
+        except Exception as e:
+            print(f"Host health file unreadable, starting fresh: {e}")
+            self._hosts = {}
+
+    def _save(self):
+        """Persist host state (caller holds the lock)"""
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._hosts, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def backoff_remaining(self, url: str) -> float:
+        """Seconds until the host may be contacted again (0 if healthy)"""
+        with self._lock:
+            state = self._hosts.get(host_key(url))
+            until = state['backoff_until'] if state else 0
+        return max(0.0, until - time.time())
+
+    def is_available(self, url: str) -> bool:
+        return self.backoff_remaining(url) == 0
+
+    def check(self, url: str):
+        """Raise HostBackoff if the host is still backing off"""
+        remaining = self.backoff_remaining(url)
+        if remaining:
+            with self._lock:
+                self.skipped += 1
+            raise HostBackoff(f"{host_key(url)} backing off for another {remaining:.0f}s")
+
+    def record_failure(self, url: str, error: Exception) -> Optional[float]:
+        """Count a failed request; returns the backoff applied, or None if not a host failure"""
+        kind = classify_failure(error)
+        if kind is None:
+            return None
+        host = host_key(url)
+        now = time.time()
+        with self._lock:
+            state = self._hosts.setdefault(host, {
+                'consecutive': 0, 'kinds': {}, 'backoff_until': 0, 'last_failure': 0, 'last_error': ''})
+            state['consecutive'] += 1
+            state['kinds'][kind] = state['kinds'].get(kind, 0) + 1
+            delay = self.base * FAILURE_FACTORS.get(kind, 1) * 2 ** (state['consecutive'] - 1)
+            retry_after = _retry_after(error) if kind == 'rate_limited' else None
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            delay = min(delay, self.max_backoff)
+            state['backoff_until'] = max(state['backoff_until'], now + delay)
+            state['last_failure'] = now
+            state['last_error'] = f"{kind}: {error}"[:200]
+            self._save()
+        print(f"Host {host} failed ({kind}), backing off {delay:.0f}s")
+        return delay
+
+    def record_success(self, url: str):
+        """Reset the failure streak after a good response"""
+        host = host_key(url)
+        with self._lock:
+            state = self._hosts.get(host)
+            if state and (state['consecutive'] or state['backoff_until']):
+                state['consecutive'] = 0
+                state['backoff_until'] = 0
+                self._save()
+
+    def get_statistics(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            kinds: Dict[str, int] = {}
+            for state in self._hosts.values():
+                for kind, count in state['kinds'].items():
+                    kinds[kind] = kinds.get(kind, 0) + count
+            return {
+                'hosts_tracked': len(self._hosts),
+                'hosts_backing_off': sorted(h for h, s in self._hosts.items() if s['backoff_until'] > now),
+                'failures_by_kind': kinds,
+                'requests_skipped': self.skipped,
+            }
+
+
+_shared_health: Optional[HostHealth] = None
+_shared_lock = threading.Lock()
+
+
+def get_host_health() -> HostHealth:
+    """Process-wide host health shared by every downloader"""
+    global _shared_health
+    with _shared_lock:
+        if _shared_health is None:
+            _shared_health = HostHealth()
+        return _shared_health
@@ -0,0 +1,269 @@
+"""
+HTTP Response Cache
+On-disk cache of GET bodies with ETag/Last-Modified revalidation,
+mounted under requests.Session as a transport adapter
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from config import (HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_MAX_ENTRY_BYTES,
+                    HTTP_CACHE_SAVE_EVERY)
+
+# Headers worth replaying from cache. Bodies are stored decoded, so
+# content-encoding/content-length must not be kept.
+STORED_HEADERS = ('content-type', 'etag', 'last-modified', 'cache-control', 'date')
+BODY_FILE_RE = re.compile(r'[0-9a-f]{40}(\.tmp\d+)?')   # Body files and their partial writes
+
+
+class HTTPCache:
+    """
+    Size-bounded LRU store of response bodies and their validators. The
+    index is snapshotted every save_every changes and on flush(); entries
+    lost in a crash are simply fetched again, and index entries whose body
+    file was evicted meanwhile are dropped on load.
+    """
+
+    def __init__(self, cache_dir: Path = HTTP_CACHE_DIR, max_bytes: int = HTTP_CACHE_MAX_BYTES,
+                 max_entry_bytes: int = HTTP_CACHE_MAX_ENTRY_BYTES,
+                 save_every: int = HTTP_CACHE_SAVE_EVERY):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / "index.json"
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.save_every = save_every
+        self._unsaved = 0
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()  # url -> entry, LRU first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0  # 304s answered from disk
+        self.stores = 0
+        self._load_index()
+
+    def _load_index(self):
+        """
+        Load the cache index, dropping entries whose body file is gone and
+        deleting body files the index does not know (written after the last
+        snapshot), which would otherwise sit outside the byte budget
+        """
+        entries = []
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except Exception as e:
+                print(f"HTTP cache index unreadable, starting empty: {e}")
+        for entry in entries:
+            if (self.cache_dir / entry['file']).exists():
+                self._entries[entry['url']] = entry
+                self._total_bytes += entry['size']
+        known = {entry['file'] for entry in self._entries.values()}
+        orphans = 0
+        for path in self.cache_dir.iterdir():
+            if path.name not in known and BODY_FILE_RE.fullmatch(path.name):
+                try:
+                    path.unlink()
+                    orphans += 1
+                except OSError:
+                    pass
+        if orphans:
+            print(f"HTTP cache: removed {orphans} unindexed body files")
+
+    def _save_index(self):
+        """Persist the index in LRU order (caller holds the lock)"""
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(list(self._entries.values()), f)
+        os.replace(tmp_file, self.index_file)
+        self._unsaved = 0
+
+    def _changed(self):
+        """Count a change and snapshot every save_every (caller holds the lock)"""
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self._save_index()
+
+    def flush(self):
+        """Persist any changes not yet snapshotted"""
+        with self._lock:
+            if self._unsaved:
+                self._save_index()
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Get the cache entry for a URL, marking it recently used"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry:
+                self._entries.move_to_end(url)
+            return entry
+
+    def read_body(self, entry: dict) -> Optional[bytes]:
+        """Read a cached body, or None if the file has disappeared"""
+        try:
+            with open(self.cache_dir / entry['file'], 'rb') as f:
+                return f.read()
+        except OSError:
+            self.forget(entry['url'])
+            return None
+
+    def forget(self, url: str):
+        with self._lock:
+            entry = self._entries.pop(url, None)
+            if entry:
+                self._total_bytes -= entry['size']
+                self._remove_file(entry)
+
+    def _remove_file(self, entry: dict):
+        try:
+            (self.cache_dir / entry['file']).unlink()
+        except OSError:
+            pass
+
+    @staticmethod
+    def is_cacheable(response: Response) -> bool:
+        """Only responses with validators can be revalidated later"""
+        if response.status_code != 200 or response.request.method != 'GET':
+            return False
+        if 'no-store' in response.headers.get('cache-control', '').lower():
+            return False
+        return bool(response.headers.get('etag') or response.headers.get('last-modified'))
+
+    def store(self, response: Response, body: bytes):
+        """Store a fully read 200 response body and its validators"""
+        if not self.is_cacheable(response) or len(body) > self.max_entry_bytes:
+            return
+
+        url = response.request.url
+        filename = hashlib.sha1(url.encode()).hexdigest()
+        tmp_path = self.cache_dir / f"{filename}.tmp{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, self.cache_dir / filename)
+
+        entry = {
+            'url': url,
+            'file': filename,
+            'size': len(body),
+            'headers': {k: response.headers[k] for k in STORED_HEADERS if k in response.headers},
+        }
+        with self._lock:
+            old = self._entries.pop(url, None)
+            if old:
+                self._total_bytes -= old['size']
+            self._entries[url] = entry
+            self._total_bytes += entry['size']
+            self.stores += 1
+            self._evict()
+            self._changed()
+
+    def refresh(self, url: str, headers: CaseInsensitiveDict):
+        """Merge updated validators from a 304 into the stored entry"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry:
+                return
+            for key in STORED_HEADERS:
+                if key in headers:
+                    entry['headers'][key] = headers[key]
+            self.hits += 1
+            self._changed()
+
+    def _evict(self):
+        """Drop least-recently-used entries until under the byte budget"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry['size']
+            self._remove_file(entry)
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'stores': self.stores,
+            }
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    Transport adapter that makes GETs conditional when a cached copy exists
+    and answers 304s with the stored body. Streamed responses are not read
+    here; their consumers call HTTPCache.store once the body is complete.
+    With store=False cached copies are still used but nothing new is written.
+    """
+
+    def __init__(self, cache: "HTTPCache", store: bool = True, **kwargs):
+        self.cache = cache
+        self.store = store
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, stream=stream, **kwargs)
+
+        entry = self.cache.lookup(request.url)
+        if entry:
+            validators = entry['headers']
+            if 'etag' in validators:
+                request.headers.setdefault('If-None-Match', validators['etag'])
+            if 'last-modified' in validators:
+                request.headers.setdefault('If-Modified-Since', validators['last-modified'])
+
+        response = super().send(request, stream=stream, **kwargs)
+
+        if response.status_code == 304 and entry:
+            body = self.cache.read_body(entry)
+            if body is not None:
+                self.cache.refresh(request.url, response.headers)
+                response.close()
+                return self._cached_response(request, entry, body, response)
+            # Body vanished from disk: fetch unconditionally
+            response.close()
+            request.headers.pop('If-None-Match', None)
+            request.headers.pop('If-Modified-Since', None)
+            return super().send(request, stream=stream, **kwargs)
+
+        if self.store and not stream and self.cache.is_cacheable(response):
+            self.cache.store(response, response.content)
+        return response
+
+    def _cached_response(self, request, entry: dict, body: bytes, revalidation: Response) -> Response:
+        """Build a 200 response that serves the stored body"""
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = revalidation.elapsed
+        response.from_cache = True
+        return response
+
+
+_shared_cache: Optional[HTTPCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Process-wide response cache shared by every session"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = HTTPCache()
+        return _shared_cache
@@ -0,0 +1,395 @@
+"""
+Image Catalog
+Index of every stored original image (topics, size, dimensions, format,
+perceptual hash, aspect ratio, dominant colour) kept current as images
+are saved, with O(1) random sampling and topic lookup so nothing has to
+walk data/images at display time. Images within a few bits of an earlier
+one's perceptual hash are filed as copies of it and not shown again.
+"""
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config import IMAGES_DIR, IMAGE_CATALOG_FILE, IMAGE_CATALOG_REFRESH_SECONDS, IMAGE_DUPLICATE_MAX_DISTANCE
+from image_store import is_original_image, topic_dir_for
+from hash_index import HashIndex
+from perceptual_hash import HASH_BITS, describe_image, has_structure, HAS_PIL
+
+SAVE_EVERY = 20   # Changes between snapshots; refresh() reconciles anything lost
+WIDE_ASPECT = 1.25   # Width/height at or above which an image is laid out as wide
+TALL_ASPECT = 0.8    # ... and at or below which as tall
+
+
+@dataclass
+class ImageRecord:
+    """One stored original image"""
+    path: str
+    topics: List[str] = field(default_factory=list)   # Full topic names (folder names for pre-catalog images)
+    size: int = 0
+    width: int = 0
+    height: int = 0
+    format: str = ''
+    dhash: str = ''       # 256-bit difference hash as hex; '' until computed
+    aspect: float = 0.0   # Width / height as displayed (after EXIF rotation)
+    colour: str = ''      # Dominant colour, #rrggbb
+
+    @property
+    def layout(self) -> str:
+        """'wide', 'tall' or 'square' ('' when the aspect is unknown)"""
+        if not self.aspect:
+            return ''
+        if self.aspect >= WIDE_ASPECT:
+            return 'wide'
+        if self.aspect <= TALL_ASPECT:
+            return 'tall'
+        return 'square'
+
+
+def read_image_info(source, size: int = None) -> dict:
+    """
+    Size plus everything describe_image() can read (one decode of a small
+    thumbnail); unreadable images are still catalogued and renderers skip them
+    """
+    info = {'size': size if size is not None else Path(source).stat().st_size}
+    info.update(describe_image(source))
+    if 'format' not in info and not hasattr(source, 'read'):
+        info['format'] = Path(source).suffix.lower().lstrip('.').replace('jpg', 'jpeg')
+    return info
+
+
+def folder_topic(topic: str) -> str:
+    """The (truncated) topic name recoverable from an image folder"""
+    return topic_dir_for(topic).name.replace('_', ' ')
+
+
+class ImageCatalog:
+    """
+    path -> ImageRecord, plus a path list with slot map for O(1) random
+    picks and topic -> paths for O(1) topic lookup. refresh() rescans only
+    topic folders whose modification time changed since the last scan; the
+    shared catalog runs it at startup and every IMAGE_CATALOG_REFRESH_SECONDS.
+
+    Distinct images (those whose hash is not within max_distance bits of
+    an earlier one) are in the hash index and the sampling list; the rest are
+    copies, mapped to the distinct image they duplicate. When a distinct
+    image is removed its copies are placed again, so one of them takes
+    over. Copies are recomputed on load rather than stored.
+    """
+
+    def __init__(self, catalog_file: Path = IMAGE_CATALOG_FILE, images_dir: Path = IMAGES_DIR,
+                 max_distance: int = IMAGE_DUPLICATE_MAX_DISTANCE):
+        self.catalog_file = Path(catalog_file)
+        self.images_dir = Path(images_dir)
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._records: Dict[str, ImageRecord] = {}
+        self._paths: List[str] = []          # Distinct images only
+        self._slots: Dict[str, int] = {}
+        self._by_topic: Dict[str, List[str]] = {}
+        self._hashes = HashIndex(HASH_BITS, max_distance)   # dHash of each distinct image
+        self._copy_of: Dict[str, str] = {}   # copy -> the distinct image it duplicates
+        self._copies: Dict[str, List[str]] = {}
+        self._dir_mtimes: Dict[str, float] = {}
+        self._unsaved = 0
+        self._load()
+
+    def _load(self):
+        if not self.catalog_file.exists():
+            return
+        try:
+            with open(self.catalog_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for record in data['images']:
+                self._insert(ImageRecord(**record))
+            self._dir_mtimes = data.get('dirs', {})
+        except Exception as e:
+            print(f"Image catalog unreadable, rebuilding: {e}")
+            self._records, self._paths, self._slots, self._by_topic = {}, [], {}, {}
+            self._hashes, self._copy_of, self._copies = HashIndex(HASH_BITS, self.max_distance), {}, {}
+            self._dir_mtimes = {}
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        """Persist the catalog (caller holds the lock)"""
+        tmp_file = self.catalog_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'images': [asdict(r) for r in self._records.values()],
+                       'dirs': self._dir_mtimes}, f)
+        os.replace(tmp_file, self.catalog_file)
+        self._unsaved = 0
+
+    def _changed(self):
+        """Count a change and snapshot every SAVE_EVERY (caller holds the lock)"""
+        self._unsaved += 1
+        if self._unsaved >= SAVE_EVERY:
+            self._save()
+
+    def _insert(self, record: ImageRecord):
+        self._records[record.path] = record
+        for topic in record.topics:
+            self._by_topic.setdefault(topic, []).append(record.path)
+        self._place(record.path)
+
+    def _place(self, path: str):
+        """File an image as a copy of a near-identical distinct image, or as distinct"""
+        record = self._records[path]
+        value = int(record.dhash, 16) if record.dhash else 0
+        if has_structure(value):
+            original = self._hashes.nearest(value)
+            if original is not None:
+                self._copy_of[path] = original
+                self._copies.setdefault(original, []).append(path)
+                return
+            self._hashes.add(value, path)
+        self._slots[path] = len(self._paths)
+        self._paths.append(path)
+
+    def _unplace(self, path: str):
+        """Undo _place, re-placing any copies of a distinct image"""
+        original = self._copy_of.pop(path, None)
+        if original is not None:
+            self._copies[original].remove(path)
+            if not self._copies[original]:
+                del self._copies[original]
+            return
+        slot = self._slots.pop(path)
+        last = self._paths.pop()
+        if last != path:
+            self._paths[slot] = last
+            self._slots[last] = slot
+        self._hashes.remove(path)
+        for copy in self._copies.pop(path, []):
+            del self._copy_of[copy]
+            self._place(copy)
+
+    def _remove(self, path: str):
+        if path not in self._records:
+            return
+        self._unplace(path)
+        record = self._records.pop(path)
+        for topic in record.topics:
+            paths = self._by_topic.get(topic, [])
+            if path in paths:
+                paths.remove(path)
+            if not paths:
+                self._by_topic.pop(topic, None)
+
+    def add(self, path, topic: str, info: dict = None):
+        """
+        Catalogue a saved image under a topic (or add the topic to a known
+        image); info is read_image_info() output when the caller has it
+        """
+        path = str(path)
+        with self._lock:
+            record = self._records.get(path)
+            if record is not None:
+                if topic not in record.topics:
+                    record.topics.append(topic)
+                    self._by_topic.setdefault(topic, []).append(path)
+                    self._changed()
+                return
+        info = info or read_image_info(Path(path))
+        with self._lock:
+            if path not in self._records:
+                self._insert(ImageRecord(path=path, topics=[topic], **info))
+                self._changed()
+
+    def remove(self, path):
+        with self._lock:
+            self._remove(str(path))
+            self._changed()
+
+    def find_duplicate(self, dhash: str) -> Optional[str]:
+        """Distinct image within max_distance bits of a hash, if any"""
+        value = int(dhash, 16) if dhash else 0
+        if not has_structure(value):
+            return None
+        with self._lock:
+            return self._hashes.nearest(value)
+
+    def original_of(self, path) -> str:
+        """The distinct image a path duplicates, or the path itself"""
+        path = str(path)
+        return self._copy_of.get(path, path)
+
+    def distinct(self, paths: Iterable[str]) -> List[str]:
+        """Paths with near-duplicates collapsed onto one image, order kept"""
+        seen = set()
+        result = []
+        for path in paths:
+            original = self.original_of(path)
+            if original not in seen:
+                seen.add(original)
+                result.append(original)
+        return result
+
+    def backfill(self) -> int:
+        """Read hash, aspect and colour for images catalogued without them; returns the count"""
+        if not HAS_PIL:
+            return 0
+        with self._lock:
+            missing = [path for path, record in self._records.items() if not record.dhash]
+        filled = 0
+        for path in missing:
+            if not os.path.exists(path):
+                continue
+            info = read_image_info(path)
+            if not info.get('dhash'):
+                continue  # Unreadable; leave it for the renderers to skip
+            with self._lock:
+                record = self._records.get(path)
+                if record is None:
+                    continue
+                self._unplace(path)
+                for name, value in info.items():
+                    setattr(record, name, value)
+                self._place(path)
+                self._changed()
+            filled += 1
+        if filled:
+            self.save()
+        return filled
+
+    def refresh(self) -> int:
+        """Pick up images added or deleted outside the ingestor; returns changes"""
+        changes = 0
+        seen_dirs = {}
+        if self.images_dir.exists():
+            with os.scandir(self.images_dir) as entries:
+                topic_dirs = [Path(e.path) for e in entries if e.is_dir()]
+        else:
+            topic_dirs = []
+
+        by_dir = None   # Built on the first changed folder
+        for topic_dir in topic_dirs:
+            key = str(topic_dir)
+            mtime = topic_dir.stat().st_mtime
+            seen_dirs[key] = mtime
+            if self._dir_mtimes.get(key) == mtime:
+                continue
+            if by_dir is None:
+                by_dir = self._paths_by_dir()
+            on_disk = {str(p) for p in topic_dir.iterdir() if is_original_image(p) and p.is_file()}
+            known = by_dir.get(key, set())
+            topic = topic_dir.name.replace('_', ' ')
+            for path in on_disk - known:
+                self.add(path, topic)
+                changes += 1
+            with self._lock:
+                for path in known - on_disk:
+                    self._remove(path)
+                    changes += 1
+
+        with self._lock:
+            # Whole folders that disappeared
+            vanished = set(self._dir_mtimes) - set(seen_dirs)
+            if vanished:
+                by_dir = self._paths_by_dir(locked=True)
+            for key in vanished:
+                for path in by_dir.get(key, ()):
+                    self._remove(path)
+                    changes += 1
+            if changes or seen_dirs != self._dir_mtimes:
+                self._dir_mtimes = seen_dirs
+                self._save()
+        return changes
+
+    def _refresh_loop(self, interval: float):
+        """Background thread: refresh() every interval for the rest of the session"""
+        while True:
+            time.sleep(interval)
+            try:
+                changes = self.refresh()
+                if changes:
+                    print(f"Image catalog: {changes} changes from disk")
+            except Exception as e:
+                print(f"Image catalog refresh error: {e}")
+
+    def start_refresh(self, interval: float = IMAGE_CATALOG_REFRESH_SECONDS) -> threading.Thread:
+        """Keep picking up images saved outside the ingestor (other processes, copied-in files)"""
+        thread = threading.Thread(target=self._refresh_loop, args=(interval,),
+                                  name="image-catalog-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    def _paths_by_dir(self, locked: bool = False) -> Dict[str, set]:
+        """Folder -> catalogued paths"""
+        if not locked:
+            with self._lock:
+                return self._paths_by_dir(locked=True)
+        by_dir: Dict[str, set] = {}
+        for path in self._records:
+            by_dir.setdefault(os.path.dirname(path), set()).add(path)
+        return by_dir
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, path) -> bool:
+        return str(path) in self._records
+
+    def get(self, path) -> Optional[ImageRecord]:
+        return self._records.get(str(path))
+
+    def all_paths(self) -> List[str]:
+        """Every catalogued image, copies included"""
+        with self._lock:
+            return list(self._records)
+
+    def distinct_paths(self) -> List[str]:
+        with self._lock:
+            return list(self._paths)
+
+    def sample(self, count: int = 1) -> List[str]:
+        """Up to `count` random images, no two of them near-duplicates"""
+        with self._lock:
+            if not self._paths:
+                return []
+            slots = random.sample(range(len(self._paths)), min(count, len(self._paths)))
+            return [self._paths[slot] for slot in slots]
+
+    def images_for_topic(self, topic: str) -> List[str]:
+        """
+        Distinct images filed under a topic; images from before the catalog
+        match by folder name
+        """
+        with self._lock:
+            paths = list(self._by_topic.get(topic, ()))
+            paths.extend(self._by_topic.get(folder_topic(topic), ()))
+            return self.distinct(paths)
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                'images': len(self._records),
+                'distinct_images': len(self._paths),
+                'near_duplicates': len(self._copy_of),
+                'topics': len(self._by_topic),
+                'bytes': sum(r.size for r in self._records.values()),
+            }
+
+
+_shared_catalog: Optional[ImageCatalog] = None
+_shared_lock = threading.Lock()
+
+
+def get_image_catalog() -> ImageCatalog:
+    """Process-wide catalog, reconciled with data/images on first use and periodically after"""
+    global _shared_catalog
+    with _shared_lock:
+        if _shared_catalog is None:
+            _shared_catalog = ImageCatalog()
+            started = time.monotonic()
+            changes = _shared_catalog.refresh()
+            if changes:
+                print(f"Image catalog: {changes} changes from disk in {time.monotonic() - started:.2f}s")
+            _shared_catalog.start_refresh()
+        return _shared_catalog
@@ -0,0 +1,386 @@
+"""
+Image Ingestion Service
+Shared worker pool that downloads images and stores each unique image
+once, addressed by the SHA-256 of its bytes
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from PIL import Image, ImageOps
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+from config import (
+    IMAGES_DIR, IMAGE_INDEX_FILE, FETCH_CONCURRENCY,
+    DISPLAY_IMAGE_SIZE, SPRITE_IMAGE_SIZE, SECONDARY_COLOR
+)
+from downloader import Downloader, IMAGE_KINDS
+from perceptual_hash import describe_image
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+SAVE_EVERY = 20   # Index changes between snapshots; a lost entry just means a re-download
+
+# Display-ready copies stored next to each original as <stem>@<kind><ext>
+DERIVATIVES = {
+    'display': '.jpg',   # presentation frame, flattened onto the slide colour
+    'sprite': '.png',    # cinematic floating image, keeps transparency
+}
+DERIVATIVE_BOUNDS = {
+    'display': DISPLAY_IMAGE_SIZE,
+    'sprite': (SPRITE_IMAGE_SIZE, SPRITE_IMAGE_SIZE),
+}
+
+
+def topic_dir_for(topic: str) -> Path:
+    """Folder that images for a topic are filed under"""
+    return IMAGES_DIR / topic.replace(' ', '_')[:30]
+
+
+def image_extension(body: bytes, content_type: str = '') -> str:
+    """Pick a file extension from magic bytes, falling back to the header"""
+    if body.startswith(b'\x89PNG'):
+        return '.png'
+    if body.startswith(b'GIF8'):
+        return '.gif'
+    if body[:4] == b'RIFF' and body[8:12] == b'WEBP':
+        return '.webp'
+    if body.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    for ext in ('png', 'gif', 'webp'):
+        if ext in content_type:
+            return f'.{ext}'
+    return '.jpg'
+
+
+def derivative_path(original, kind: str) -> Path:
+    """Where the given derivative of an image lives"""
+    original = Path(original)
+    return original.with_name(f"{original.stem}@{kind}{DERIVATIVES[kind]}")
+
+
+def is_derivative(path) -> bool:
+    return '@' in Path(path).stem
+
+
+def is_original_image(path: Path) -> bool:
+    """True for downloaded images (not derivatives or other files)"""
+    return path.suffix.lower() in IMAGE_EXTENSIONS and not is_derivative(path)
+
+
+def display_path(original: str, kind: str) -> str:
+    """Pre-scaled derivative if it exists, otherwise the original file"""
+    derived = derivative_path(original, kind)
+    return str(derived) if derived.exists() else original
+
+
+def make_derivatives(original) -> Dict[str, str]:
+    """
+    Decode an image once and write the display and sprite derivatives:
+    EXIF-oriented, converted to RGB/RGBA and shrunk to their render size.
+    """
+    if not HAS_PIL:
+        return {}
+    created = {}
+    with Image.open(original) as img:
+        img.draft('RGB', DISPLAY_IMAGE_SIZE)  # Let JPEG decode at reduced scale
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA')
+
+        display = img.copy()
+        display.thumbnail(DERIVATIVE_BOUNDS['display'], Image.Resampling.LANCZOS)
+        flat = Image.new('RGB', display.size, SECONDARY_COLOR)
+        flat.paste(display, mask=display.getchannel('A'))
+        path = derivative_path(original, 'display')
+        flat.save(path, 'JPEG', quality=88)
+        created['display'] = str(path)
+
+        sprite = img
+        sprite.thumbnail(DERIVATIVE_BOUNDS['sprite'], Image.Resampling.LANCZOS)
+        path = derivative_path(original, 'sprite')
+        sprite.save(path, 'PNG', optimize=False)
+        created['sprite'] = str(path)
+    return created
+
+
+def is_undersized(original, kind: str) -> bool:
+    """
+    True when a derivative was made for a smaller bound than the configured
+    one and the original has the pixels to fill more of it (header reads only)
+    """
+    with Image.open(original) as img, Image.open(derivative_path(original, kind)) as derived:
+        (bw, bh), (w, h) = DERIVATIVE_BOUNDS[kind], img.size
+        fit = min(bw / w, bh / h, bh / w, bw / h, 1.0)   # Either way up, as EXIF may rotate it
+        return max(derived.size) < int(max(img.size) * fit) - 1
+
+
+def ensure_derivatives(original, check_size: bool = False) -> Dict[str, str]:
+    """
+    Create any missing derivatives for an image, logging failures. With
+    check_size, ones made before a render bound was raised are remade too.
+    """
+    try:
+        if all(derivative_path(original, kind).exists() for kind in DERIVATIVES) and not (
+                check_size and HAS_PIL and any(is_undersized(original, kind) for kind in DERIVATIVES)):
+            return {}
+        return make_derivatives(original)
+    except Exception as e:
+        print(f"Could not create derivatives for {original}: {e}")
+        return {}
+
+
+class ImageIngestor:
+    """
+    Downloads images on a bounded pool and deduplicates them by content.
+    The index maps content hash -> stored file, and source URL -> hash so a
+    URL we have already ingested is never downloaded again. With a catalog,
+    an image that is perceptually the same as a stored one (resized,
+    recompressed) is not stored; its hash maps to the stored file instead.
+    Each call downloads through the caller's downloader (its transport,
+    cache and host health); `downloader` is only the default.
+    """
+
+    def __init__(self, downloader: Downloader = None, max_workers: int = FETCH_CONCURRENCY,
+                 index_file: Path = IMAGE_INDEX_FILE, catalog=None):
+        self.downloader = downloader
+        self.catalog = catalog   # ImageCatalog told about every stored image, if given
+        self.index_file = Path(index_file)
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="image-ingest")
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, dict] = {}   # sha256 -> {'path', 'size', 'topics'}
+        self._urls: Dict[str, str] = {}      # source url -> sha256
+        self._unsaved = 0
+
+        # Session counters
+        self.downloads = 0
+        self.bytes_downloaded = 0
+        self.download_seconds = 0.0
+        self.duplicates = 0
+        self.near_duplicates = 0
+        self.bytes_saved = 0
+        self.url_hits = 0
+
+        if self.index_file.exists():
+            self._load_index()
+        else:
+            self.index_existing()
+        # Older images predate derivatives; fill them in on one thread of their
+        # own, so live ingests keep every pool worker
+        self._backfill_thread = threading.Thread(target=self.backfill_derivatives,
+                                                 name="image-backfill", daemon=True)
+        self._backfill_thread.start()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._hashes = data.get('hashes', {})
+            self._urls = data.get('urls', {})
+        except Exception as e:
+            print(f"Image index unreadable, rebuilding: {e}")
+            self.index_existing()
+
+    def _save_index(self):
+        """Persist the index (caller holds the lock)"""
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'hashes': self._hashes, 'urls': self._urls}, f)
+        os.replace(tmp_file, self.index_file)
+        self._unsaved = 0
+
+    def _changed(self):
+        """Count an index change and snapshot every SAVE_EVERY (caller holds the lock)"""
+        self._unsaved += 1
+        if self._unsaved >= SAVE_EVERY:
+            self._save_index()
+
+    def flush(self):
+        """Persist any index changes not yet snapshotted"""
+        with self._lock:
+            if self._unsaved:
+                self._save_index()
+
+    def index_existing(self) -> int:
+        """Hash images already on disk; repeats are counted but left in place"""
+        found = 0
+        with self._lock:
+            for path in sorted(IMAGES_DIR.rglob('*')):
+                if not is_original_image(path) or not path.is_file():
+                    continue
+                digest = hashlib.sha256(path.read_bytes()).hexdigest()
+                entry = self._hashes.get(digest)
+                if entry is None:
+                    self._hashes[digest] = {'path': str(path), 'size': path.stat().st_size,
+                                            'topics': [path.parent.name]}
+                    found += 1
+                elif path.parent.name not in entry['topics']:
+                    entry['topics'].append(path.parent.name)
+            self._save_index()
+        print(f"Indexed {found} unique images")
+        return found
+
+    def backfill_derivatives(self) -> int:
+        """Create derivatives for every stored image that lacks them or has undersized ones"""
+        created = 0
+        if self.catalog is not None:
+            originals = map(Path, self.catalog.all_paths())
+        else:
+            originals = (p for p in IMAGES_DIR.rglob('*') if is_original_image(p))
+        for path in originals:
+            if ensure_derivatives(path, check_size=True):
+                created += 1
+        if created:
+            print(f"Created display derivatives for {created} images")
+        if self.catalog is not None:
+            hashed = self.catalog.backfill()
+            if hashed:
+                print(f"Computed perceptual hashes for {hashed} images")
+        return created
+
+    def lookup_url(self, url: str) -> Optional[str]:
+        """Stored path for a previously ingested URL, if still on disk"""
+        with self._lock:
+            digest = self._urls.get(url)
+            entry = self._hashes.get(digest) if digest else None
+        if entry and os.path.exists(entry['path']):
+            return entry['path']
+        return None
+
+    def ensure_workers(self, max_workers: int):
+        """Grow the pool to at least max_workers; queued ingests finish on the old one"""
+        with self._lock:
+            if max_workers <= self.max_workers:
+                return
+            old, self.max_workers = self._executor, max_workers
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-ingest")
+        old.shutdown(wait=False)
+
+    def submit(self, url: str, topic: str, downloader: Downloader = None) -> Future:
+        """Queue one image for ingestion; the future yields its path or None"""
+        return self._executor.submit(self._ingest_one, url, topic, downloader or self.downloader)
+
+    def ingest(self, urls: List[str], topic: str, downloader: Downloader = None) -> List[str]:
+        """Ingest images in parallel; returns unique local paths in input order"""
+        futures = [self.submit(url, topic, downloader) for url in urls if url]
+        paths = []
+        for future in futures:
+            path = future.result()
+            if path and path not in paths:
+                paths.append(path)
+        return paths
+
+    def _ingest_one(self, url: str, topic: str, downloader: Downloader) -> Optional[str]:
+        existing = self.lookup_url(url)
+        if existing:
+            with self._lock:
+                self.url_hits += 1
+            return existing
+
+        try:
+            started = time.monotonic()
+            response = downloader.fetch(url, allowed=IMAGE_KINDS, timeout=10)
+            elapsed = time.monotonic() - started
+        except Exception as e:
+            print(f"Error downloading image {url}: {e}")
+            return None
+
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        topic_folder = topic_dir_for(topic)
+
+        with self._lock:
+            self.downloads += 1
+            self.bytes_downloaded += len(body)
+            self.download_seconds += elapsed
+            self._urls[url] = digest
+            self._changed()
+
+            entry = self._hashes.get(digest)
+            if entry and os.path.exists(entry['path']):
+                self.duplicates += 1
+                self.bytes_saved += len(body)
+                if topic_folder.name not in entry['topics']:
+                    entry['topics'].append(topic_folder.name)
+                existing = entry['path']
+            else:
+                existing = None
+        if existing:
+            if self.catalog is not None:
+                self.catalog.add(existing, topic)
+            return existing
+
+        # Hash, aspect and colour from a small decode of the bytes we already hold
+        info = {'size': len(body), **describe_image(io.BytesIO(body))}
+        if self.catalog is not None:
+            original = self.catalog.find_duplicate(info.get('dhash', ''))
+            if original and os.path.exists(original):
+                with self._lock:
+                    self.near_duplicates += 1
+                    self.bytes_saved += len(body)
+                    self._hashes[digest] = {'path': original, 'size': len(body),
+                                            'topics': [topic_folder.name]}
+                    self._changed()
+                self.catalog.add(original, topic)
+                return original
+
+        # Written outside the lock; a concurrent copy of the same bytes lands on the same name
+        topic_folder.mkdir(parents=True, exist_ok=True)
+        ext = image_extension(body, response.headers.get('content-type', ''))
+        filepath = topic_folder / (digest[:16] + ext)
+        tmp_path = filepath.with_name(f"{filepath.name}.tmp{threading.get_ident()}")
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, filepath)
+        with self._lock:
+            self._hashes[digest] = {'path': str(filepath), 'size': len(body),
+                                    'topics': [topic_folder.name]}
+            self._changed()
+
+        # Decode once here so renderers never scale full-size originals
+        ensure_derivatives(filepath)
+        if self.catalog is not None:
+            self.catalog.add(filepath, topic, info if 'dhash' in info else None)
+        return str(filepath)
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                'unique_images': len(self._hashes),
+                'downloads': self.downloads,
+                'bytes_downloaded': self.bytes_downloaded,
+                'duplicates': self.duplicates,
+                'near_duplicates': self.near_duplicates,
+                'bytes_saved': self.bytes_saved,
+                'url_hits': self.url_hits,
+                'throughput_kbps': (self.bytes_downloaded / 1024 / self.download_seconds
+                                    if self.download_seconds else 0.0),
+            }
+
+
+_shared_ingestor: Optional[ImageIngestor] = None
+_shared_lock = threading.Lock()
+
+
+def get_image_ingestor(max_workers: int = FETCH_CONCURRENCY, catalog=None) -> ImageIngestor:
+    """
+    Process-wide ingestor, so every searcher shares one worker pool and one
+    index. Callers pass their own downloader to ingest(); the pool grows to
+    the largest max_workers asked for, and the first caller's catalog is used.
+    """
+    global _shared_ingestor
+    with _shared_lock:
+        if _shared_ingestor is None:
+            _shared_ingestor = ImageIngestor(max_workers=max_workers, catalog=catalog)
+        else:
+            _shared_ingestor.ensure_workers(max_workers)
+        return _shared_ingestor
@@ -9,13 +9,16 @@ import time
 import argparse
 import signal
 from pathlib import Path
+from contextlib import closing
 from dataclasses import asdict
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import DEFAULT_SPEED, CHESS_TOPICS, calculate_delay
+from config import DEFAULT_SPEED, CHESS_TOPICS, CRAWL_ENABLED, calculate_delay
+from replay import WEB_MODES, get_web_mode, set_web_mode
 from web_search import WebSearcher, ContentItem
+from crawler import Crawler
 from data_manager import DataManager, Lesson
 from presentation import PresentationEngine
 
@@ -29,6 +32,8 @@ class LessonBuilder:
     def __init__(self, searcher: WebSearcher, data_manager: DataManager):
         self.searcher = searcher
         self.data_manager = data_manager
+        searcher.is_fresh = data_manager.is_unused   # Local search skips items already shown
+        searcher.on_content = data_manager.add_content   # Pages finishing after a lesson is full join the pool
         self.running = False
         self.thread = None
 
@@ -74,21 +79,33 @@ class LessonBuilder:
     def _build_lesson(self):
         topic = self.searcher.get_next_topic()
         print(f"\n[LessonBuilder] Building lesson: {topic}")
-        self.topics_searched += 1
 
         content_items = []
 
-        try:
-            fetched = self.searcher.fetch_topic_content(topic)
-            for content in fetched[:self.content_per_lesson]:
-                content_dict = asdict(content)
-                self.data_manager.add_content(content_dict)
-                content_items.append(content_dict)
-                self.content_fetched += 1
-                print(f"  [+] Fetched: {content.title[:50]}...")
-        except Exception as e:
-            print(f"  [!] Fetch error: {e}")
+        # Stored items matching the topic come first; the network only covers the shortfall
+        for cached in self.data_manager.select_content(topic, self.content_per_lesson):
+            content_items.append(cached)
+            print(f"  [+] Using stored: {cached.get('title', 'Unknown')[:50]}...")
+
+        if len(content_items) < self.content_per_lesson:
+            self.topics_searched += 1
+            try:
+                # Items arrive as soon as each page finishes fetching
+                with closing(self.searcher.iter_topic_content(topic)) as fetched:
+                    for content in fetched:
+                        content_dict = asdict(content)
+                        if not self.data_manager.add_content(content_dict):
+                            continue
+                        self.data_manager.mark_used(content_dict['id'])
+                        content_items.append(content_dict)
+                        self.content_fetched += 1
+                        print(f"  [+] Fetched: {content.title[:50]}...")
+                        if len(content_items) >= self.content_per_lesson:
+                            break   # Don't wait for slower pages; they are saved and pooled as they finish
+            except Exception as e:
+                print(f"  [!] Fetch error: {e}")
 
+        # Pad with anything unused
         while len(content_items) < self.content_per_lesson:
             cached = self.data_manager.get_unused_content()
             if cached:
@@ -117,11 +134,12 @@ class LessonBuilder:
 class ChessMaster:
     """Main orchestrator for the Chess Learning Presentation System"""
 
-    def __init__(self, speed: int = DEFAULT_SPEED):
+    def __init__(self, speed: int = DEFAULT_SPEED, crawl: bool = CRAWL_ENABLED):
         self.speed = speed
         self.running = False
         self.searcher = WebSearcher()
         self.data_manager = DataManager()
+        self.crawler = Crawler(self.searcher, self.data_manager) if crawl else None
         self.lesson_builder: LessonBuilder = None
         self.presentation: PresentationEngine = None
 
@@ -133,7 +151,7 @@ class ChessMaster:
     def _initial_lesson_build(self):
         print("\n=== Building Initial Lessons ===")
 
-        cached_count = len(self.data_manager.content_cache)
+        cached_count = len(self.data_manager.content_index)
         if cached_count > 0:
             print(f"Found {cached_count} cached content items")
 
@@ -159,9 +177,13 @@ class ChessMaster:
             content_items = self.searcher.fetch_topic_content(topic)
             if content_items:
                 content_dicts = []
-                for content in content_items[:2]:
+                for content in content_items:
+                    if len(content_dicts) >= 2:
+                        break
                     content_dict = asdict(content)
-                    self.data_manager.add_content(content_dict)
+                    if not self.data_manager.add_content(content_dict):
+                        continue
+                    self.data_manager.mark_used(content_dict['id'])
                     content_dicts.append(content_dict)
                     print(f"    [+] {content.title[:50]}...")
 
@@ -214,8 +236,10 @@ class ChessMaster:
         )
         self.presentation.speed = self.speed
 
-        # Start background lesson builder
+        # Start background lesson builder (and crawler)
         self.lesson_builder.start()
+        if self.crawler:
+            self.crawler.start()
 
         # Start presentation (blocks until closed)
         try:
@@ -231,9 +255,19 @@ class ChessMaster:
 
         if self.lesson_builder:
             self.lesson_builder.stop()
+        if self.crawler:
+            self.crawler.stop()
+        self.data_manager.text_index.flush(force=True)
+        self.data_manager.images.save()
+        self.searcher.http_cache.flush()
+        self.searcher.images.flush()
+        self.searcher.near_duplicates.flush()
+        if self.searcher.archive is not None:
+            self.searcher.archive.flush()
 
         dm_stats = self.data_manager.get_statistics()
         builder_stats = self.lesson_builder.get_stats() if self.lesson_builder else {}
+        crawler_stats = self.crawler.get_stats() if self.crawler else {}
 
         print(f"""
 === Session Statistics ===
@@ -241,6 +275,7 @@ Lessons Built: {builder_stats.get('lessons_built', 0)}
 Lessons Completed: {dm_stats.get('lessons_played', 0)}
 Content Items Fetched: {builder_stats.get('content_fetched', 0)}
 Topics Searched: {builder_stats.get('topics_searched', 0)}
+Pages Crawled: {crawler_stats.get('pages_crawled', 0)}
 Total Cached Content: {dm_stats.get('total_content_items', 0)}
 Total Images: {dm_stats.get('total_images', 0)}
 Lessons Saved: {dm_stats.get('lessons_saved', 0)}
@@ -260,8 +295,24 @@ def main():
              '1=very slow (~30s), 100=default (~5s), 200=fast (~0.2s)'
     )
 
+    parser.add_argument(
+        '--web-mode',
+        choices=WEB_MODES,
+        default=get_web_mode(),
+        help='live (default), record (archive all fetches and searches to data/cache) '
+             'or replay (run offline from that archive)'
+    )
+
+    parser.add_argument(
+        '--crawl',
+        action='store_true',
+        default=CRAWL_ENABLED,
+        help='Crawl the trusted chess sites in the background to keep content in stock'
+    )
+
     args = parser.parse_args()
     speed = max(1, min(200, args.speed))
+    set_web_mode(args.web_mode)
 
     def signal_handler(sig, frame):
         print("\nInterrupted by user")
@@ -269,7 +320,7 @@ def main():
 
     signal.signal(signal.SIGINT, signal_handler)
 
-    chess_master = ChessMaster(speed=speed)
+    chess_master = ChessMaster(speed=speed, crawl=args.crawl)
     chess_master.start()
 
 
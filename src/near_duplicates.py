@@ -0,0 +1,155 @@
+"""
+Near-Duplicate Detection
+64-bit SimHash fingerprints of content text, indexed in LSH bands so a
+new item is compared only against items sharing at least one band
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import SIMHASH_INDEX_FILE, NEAR_DUPLICATE_MAX_DISTANCE
+from hash_index import HashIndex
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 2      # Words per shingle
+SAVE_EVERY = 20       # Adds between snapshots; DataManager re-fingerprints anything lost
+WORD_RE = re.compile(r'\w+')
+
+
+def simhash(text: str) -> int:
+    """SimHash of the text's word 2-shingles, weighted by how often each occurs"""
+    words = WORD_RE.findall(text.lower())
+    if len(words) >= SHINGLE_SIZE:
+        shingles = Counter(' '.join(words[i:i + SHINGLE_SIZE])
+                           for i in range(len(words) - SHINGLE_SIZE + 1))
+    else:
+        shingles = Counter([' '.join(words)])
+
+    hashes = [(int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little'), w)
+              for s, w in shingles.items()]
+    total = sum(shingles.values())
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        mask = 1 << bit
+        # Bit is set when the shingles with it set outweigh those without
+        if 2 * sum(w for h, w in hashes if h & mask) > total:
+            fingerprint |= mask
+    return fingerprint
+
+
+class NearDuplicateIndex:
+    """
+    Fingerprints keyed by content id, in a multi-index HashIndex so
+    candidates come from its band buckets instead of a scan over every
+    stored item.
+    """
+
+    def __init__(self, index_file: Path = SIMHASH_INDEX_FILE,
+                 max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE):
+        self.index_file = Path(index_file)
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._fingerprints = HashIndex(FINGERPRINT_BITS, max_distance)
+        self.rejected = 0
+        self._unsaved = 0
+        self._load()
+
+    def _load(self):
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for content_id, hex_value in data.items():
+                self._fingerprints.add(int(hex_value, 16), content_id)
+        except Exception as e:
+            print(f"Near-duplicate index unreadable, rebuilding: {e}")
+            self._fingerprints = HashIndex(FINGERPRINT_BITS, self.max_distance)
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        """Persist fingerprints (caller holds the lock)"""
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({cid: f"{fp:016x}" for cid, fp in self._fingerprints.items()}, f)
+        os.replace(tmp_file, self.index_file)
+        self._unsaved = 0
+
+    def flush(self):
+        """Persist any adds not yet snapshotted"""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+    def __contains__(self, content_id: str) -> bool:
+        return content_id in self._fingerprints
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def find(self, text: str, exclude: str = None) -> Optional[str]:
+        """Id of a stored near-duplicate of the text, if any"""
+        fingerprint = simhash(text)
+        with self._lock:
+            return self._fingerprints.nearest(fingerprint, exclude)
+
+    def check_and_add(self, content_id: str, text: str, persist: bool = True) -> Optional[str]:
+        """
+        Register an item unless it nearly duplicates another one. Returns
+        None if it was added (or already known), else the id it duplicates.
+        Adds are snapshotted every SAVE_EVERY with persist, else left to
+        save()/flush().
+        """
+        with self._lock:
+            if content_id in self._fingerprints:
+                return None
+        fingerprint = simhash(text)
+        with self._lock:
+            if content_id in self._fingerprints:
+                return None
+            duplicate_of = self._fingerprints.nearest(fingerprint, exclude=content_id)
+            if duplicate_of is not None:
+                self.rejected += 1
+                return duplicate_of
+            self._fingerprints.add(fingerprint, content_id)
+            self._unsaved += 1
+            if persist and self._unsaved >= SAVE_EVERY:
+                self._save()
+        return None
+
+    def retain(self, content_ids) -> int:
+        """Drop fingerprints of items no longer stored; returns how many"""
+        keep = set(content_ids)
+        with self._lock:
+            stale = [cid for cid, _ in self._fingerprints.items() if cid not in keep]
+            if not stale:
+                return 0
+            for cid in stale:
+                self._fingerprints.remove(cid)
+            self._save()
+        return len(stale)
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {'fingerprints': len(self._fingerprints), 'rejected': self.rejected}
+
+
+_shared_index: Optional[NearDuplicateIndex] = None
+_shared_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """Process-wide index shared by the fetcher and the data manager"""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = NearDuplicateIndex()
+        return _shared_index
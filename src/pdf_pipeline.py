@@ -0,0 +1,295 @@
+"""
+PDF Extraction Pipeline
+Parses PDFs page by page in a small pool of worker processes under a
+per-document time budget, caching the extracted text by the PDF's
+content hash
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import PyPDF2
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
+from config import PDF_TEXT_CACHE_DIR, PDF_WORKERS, PDF_TIME_BUDGET, PDF_MAX_PAGES
+
+# Extra seconds the parent waits before treating a worker as hung
+HARD_TIMEOUT_GRACE = 5.0
+# Workers start from a fresh interpreter: forking copies locks held by the
+# fetch, rate-limiter and SQLite threads, which can deadlock the child
+_SPAWN = multiprocessing.get_context('spawn')
+
+
+@dataclass
+class PDFText:
+    """Text of one PDF, one entry per parsed page"""
+    sha256: str
+    pages: List[str] = field(default_factory=list)
+    page_count: int = 0            # Pages in the document (may exceed len(pages))
+    title: Optional[str] = None    # From the document metadata
+    complete: bool = False         # False if the page limit or time budget cut it short
+    error: Optional[str] = None
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        return '\n'.join(page for page in self.pages if page)
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def _on_budget(signum, frame):
+    raise _BudgetExceeded()
+
+
+def _extract_pages(path: str, max_pages: int, time_budget: float) -> Dict:
+    """
+    Worker process: extract text page by page until max_pages or the time
+    budget runs out. A SIGALRM timer interrupts a single slow page; pages
+    parsed before that are still returned. Windows has no setitimer, so
+    there the budget is only checked between pages and a page that never
+    finishes is left to the parent's hard timeout.
+    """
+    started = time.monotonic()
+    use_alarm = hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_budget)
+        signal.setitimer(signal.ITIMER_REAL, time_budget)
+
+    result = {'pages': [], 'page_count': 0, 'title': None, 'complete': False}
+    try:
+        reader = PyPDF2.PdfReader(path)
+        result['page_count'] = len(reader.pages)
+        try:
+            title = reader.metadata.title if reader.metadata else None
+            if title and str(title).strip():
+                result['title'] = str(title).strip()
+        except Exception:
+            pass  # Broken metadata is common and not worth failing over
+        for page in reader.pages[:max_pages]:
+            result['pages'].append(page.extract_text() or '')
+            if time.monotonic() - started > time_budget:
+                break
+        result['complete'] = len(result['pages']) == result['page_count']
+    except _BudgetExceeded:
+        pass
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return result
+
+
+def _worker_main(conn):
+    """Worker process loop: one (path, max_pages, time_budget) task at a time, None to exit"""
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        try:
+            result = _extract_pages(*task)
+        except Exception as e:
+            result = {'error': str(e) or type(e).__name__}
+        conn.send(result)
+
+
+class _Worker:
+    """One parser process and the pipe to it"""
+
+    def __init__(self):
+        self.conn, child = _SPAWN.Pipe()
+        self.process = _SPAWN.Process(target=_worker_main, args=(child,),
+                                               name="pdf-worker", daemon=True)
+        self.process.start()
+        child.close()
+
+    def run(self, task: tuple, timeout: float) -> Dict:
+        """
+        Send a task and wait for its result. Raises TimeoutError if the
+        worker is stuck and EOFError/OSError if it died.
+        """
+        self.conn.send(task)
+        if not self.conn.poll(timeout):
+            raise TimeoutError()
+        return self.conn.recv()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(1)
+        self.conn.close()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class PDFPipeline:
+    """
+    Pipeline stage for PDF text. Callers block only on their own document;
+    parsing happens in worker processes, so it neither holds the GIL nor
+    runs on the builder thread. A caller first waits for an idle worker;
+    the time budget starts only once its document is handed over, and a
+    worker that overruns it is killed without touching the others.
+    Results, including documents PyPDF2 cannot read, are cached under the
+    PDF's sha256. Timeouts and crashed workers are not cached, so the
+    document is tried again next time.
+    """
+
+    def __init__(self, max_workers: int = PDF_WORKERS, time_budget: float = PDF_TIME_BUDGET,
+                 max_pages: int = PDF_MAX_PAGES, cache_dir: Path = PDF_TEXT_CACHE_DIR):
+        self.max_workers = max(1, max_workers)
+        self.time_budget = time_budget
+        self.max_pages = max_pages
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._slots = threading.Semaphore(self.max_workers)
+        self._idle: List[_Worker] = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+        # Session counters
+        self.parsed = 0
+        self.cache_hits = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.workers_killed = 0
+        self.parse_seconds = 0.0
+
+    def _acquire(self) -> _Worker:
+        """An idle worker (started if none is), waiting while all are busy"""
+        self._slots.acquire()
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return _Worker()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, worker: Optional[_Worker]):
+        """Return a healthy worker to the pool (None after one was killed)"""
+        if worker is not None:
+            with self._lock:
+                closed = self._closed
+                if not closed:
+                    self._idle.append(worker)
+            if closed:
+                worker.close()
+        self._slots.release()
+
+    def _cache_file(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.json"
+
+    def _load(self, digest: str) -> Optional[PDFText]:
+        try:
+            with open(self._cache_file(digest), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"PDF text cache entry unreadable, re-parsing: {e}")
+            return None
+        data['from_cache'] = True
+        return PDFText(**data)
+
+    def _save(self, result: PDFText):
+        data = asdict(result)
+        del data['from_cache']
+        path = self._cache_file(result.sha256)
+        tmp_file = path.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, path)
+
+    def extract(self, pdf_path: Path, body: bytes = None) -> PDFText:
+        """Page texts for a stored PDF; `body` saves re-reading the file"""
+        if body is None:
+            body = Path(pdf_path).read_bytes()
+        digest = hashlib.sha256(body).hexdigest()
+
+        cached = self._load(digest)
+        if cached is not None:
+            with self._lock:
+                self.cache_hits += 1
+            return cached
+
+        if not HAS_PYPDF2:
+            return PDFText(digest, error="PyPDF2 not installed")  # Not cached: may be installed later
+
+        worker = self._acquire()
+        started = time.monotonic()   # Time spent waiting for a worker does not count
+        transient = False
+        try:
+            data = worker.run((str(pdf_path), self.max_pages, self.time_budget),
+                              timeout=self.time_budget + HARD_TIMEOUT_GRACE)
+            if 'error' in data:
+                print(f"PDF extraction failed for {pdf_path}: {data['error']}")
+                with self._lock:
+                    self.failures += 1
+            result = PDFText(digest, **data)
+        except TimeoutError:
+            print(f"PDF parsing exceeded {self.time_budget:.0f}s, abandoning: {pdf_path}")
+            worker.kill()
+            worker, transient = None, True
+            with self._lock:
+                self.timeouts += 1
+                self.workers_killed += 1
+            result = PDFText(digest, error="timed out")
+        except Exception as e:
+            # Died mid-task (EOFError/OSError) or left the pipe in an unknown state
+            print(f"PDF worker crashed on {pdf_path}: {e!r}")
+            worker.kill()
+            worker, transient = None, True
+            with self._lock:
+                self.failures += 1
+                self.workers_killed += 1
+            result = PDFText(digest, error=f"worker crashed: {e!r}")
+        finally:
+            self._release(worker)
+
+        with self._lock:
+            self.parsed += 1
+            self.parse_seconds += time.monotonic() - started
+        if not transient:
+            self._save(result)
+        return result
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                'parsed': self.parsed,
+                'cache_hits': self.cache_hits,
+                'timeouts': self.timeouts,
+                'failures': self.failures,
+                'workers_killed': self.workers_killed,
+                'parse_seconds': round(self.parse_seconds, 2),
+            }
+
+    def shutdown(self):
+        """Stop idle workers; busy ones stop when their document is done"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
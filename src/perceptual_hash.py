@@ -0,0 +1,90 @@
+"""
+Perceptual Hashing
+256-bit difference hashes (dHash) of images plus the layout metadata
+renderers need (oriented aspect ratio, dominant colour), computed once
+from a small thumbnail. Near-duplicate lookup is hash_index.HashIndex.
+"""
+from typing import Dict, List, Tuple
+
+try:
+    from PIL import Image, ImageOps
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+from config import SECONDARY_COLOR
+
+# 16x16 gradient bits. At 8x8 the board grid dominates and different
+# positions of a diagram land within a few bits of each other.
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+THUMBNAIL_SIZE = 64    # Decode target for hashing and colour sampling
+COLOUR_BITS = 3        # Per-channel bits when bucketing colours
+MIN_EDGE_BITS = 8      # Fewer set (or unset) bits means a flat or plain-gradient image
+
+
+def dhash(img) -> int:
+    """Difference hash: is each pixel brighter than its right neighbour, on a 17x16 greyscale"""
+    grey = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = grey.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def has_structure(value: int) -> bool:
+    """
+    False for hashes of flat or plain-gradient images, which are (almost)
+    all zeros or all ones whatever their colours and so match each other
+    """
+    ones = bin(value).count('1')
+    return MIN_EDGE_BITS <= ones <= HASH_BITS - MIN_EDGE_BITS
+
+
+def dominant_colour(img) -> str:
+    """Mean colour of the most common colour bucket, as #rrggbb"""
+    shift = 8 - COLOUR_BITS
+    buckets: Dict[Tuple[int, int, int], List[Tuple[int, int, int]]] = {}
+    data = img.convert('RGB').tobytes()
+    for i in range(0, len(data), 3):
+        pixel = (data[i], data[i + 1], data[i + 2])
+        buckets.setdefault((pixel[0] >> shift, pixel[1] >> shift, pixel[2] >> shift), []).append(pixel)
+    if not buckets:
+        return ''
+    members = max(buckets.values(), key=len)
+    r, g, b = (sum(channel) // len(members) for channel in zip(*members))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def describe_image(source) -> Dict:
+    """
+    Dimensions, format, dHash (hex), oriented aspect ratio and dominant
+    colour of an image file or file-like object. Returns {} without PIL or
+    for unreadable images.
+    """
+    if not HAS_PIL:
+        return {}
+    try:
+        with Image.open(source) as img:
+            info = {'width': img.width, 'height': img.height, 'format': (img.format or '').lower()}
+            img.draft('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE))  # Let JPEG decode at reduced scale
+            oriented = ImageOps.exif_transpose(img)
+            # Aspect from the header size, inverted when EXIF rotates by 90 degrees
+            aspect = info['width'] / info['height']
+            if oriented.size == img.size[::-1] and img.width != img.height:
+                aspect = 1 / aspect
+            info['aspect'] = round(aspect, 4)
+            thumb = oriented.convert('RGBA')
+            thumb.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+            # Transparent areas are shown on the slide colour, so hash them that way
+            flat = Image.new('RGB', thumb.size, SECONDARY_COLOR)
+            flat.paste(thumb, mask=thumb.getchannel('A'))
+            info['dhash'] = f"{dhash(flat):0{HASH_BITS // 4}x}"
+            info['colour'] = dominant_colour(flat)
+        return info
+    except Exception:
+        return {}
+
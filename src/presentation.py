@@ -12,13 +12,25 @@ from typing import Optional, Callable, TYPE_CHECKING
 
 from config import (
     BACKGROUND_COLOR, TEXT_COLOR, ACCENT_COLOR, SECONDARY_COLOR,
-    PRESENTATION_TITLE, DEFAULT_SPEED, calculate_delay
+    PRESENTATION_TITLE, DEFAULT_SPEED, calculate_delay,
+    IMAGE_FRAME_SHARE, DEFAULT_FRAME_SHARE, IMAGE_FRAME_MARGIN, IMAGE_FRAME_HEIGHT
 )
 from data_manager import Slide, Lesson
+from image_store import display_path
+from image_catalog import get_image_catalog
 
 if TYPE_CHECKING:
     from data_manager import DataManager
 
+MATTE_TINT = 0.2   # How much of an image's dominant colour shows in the frame around it
+
+
+def tinted(base: str, colour: str, amount: float) -> str:
+    """Mix `amount` of one #rrggbb colour into another"""
+    mixed = [round(int(base[i:i + 2], 16) * (1 - amount) + int(colour[i:i + 2], 16) * amount)
+             for i in (1, 3, 5)]
+    return "#{:02x}{:02x}{:02x}".format(*mixed)
+
 
 class PresentationEngine:
     """Full-screen presentation engine - plays lessons sequentially"""
@@ -41,6 +53,7 @@ class PresentationEngine:
         self.waiting_for_content = False
         self.base_delay_multiplier = 1.0
         self.photo_image = None
+        self.image_share = DEFAULT_FRAME_SHARE
         self.presentation_thread = None
 
     def setup_ui(self):
@@ -208,18 +221,46 @@ class PresentationEngine:
         self._display_image(slide.images[0] if slide.images else None, slide.slide_type)
         self.root.update_idletasks()
 
+    def _set_image_share(self, share: float, matte: str = SECONDARY_COLOR):
+        """Resize the image frame (and the text wrap beside it) and set its background"""
+        if share != self.image_share:
+            self.image_share = share
+            self.image_frame.config(width=int(self.screen_width * share))
+            wrap = int(self.screen_width * (0.85 - share))
+            self.title_label.config(wraplength=wrap)
+            self.content_label.config(wraplength=wrap)
+        self.image_frame.config(bg=matte)
+        self.image_label.config(bg=matte)
+
     def _display_image(self, image_path: str = None, slide_type: str = "content"):
         if image_path:
             try:
-                img = Image.open(image_path)
-                fw, fh = int(self.screen_width * 0.33), int(self.screen_height * 0.6)
-                ratio = img.width / img.height
+                # Catalogued aspect and colour pick the layout before any decode
+                record = get_image_catalog().get(image_path)
+                share = IMAGE_FRAME_SHARE.get(record.layout if record else '', DEFAULT_FRAME_SHARE)
+                matte = (tinted(SECONDARY_COLOR, record.colour, MATTE_TINT)
+                         if record and record.colour else SECONDARY_COLOR)
+                fw = int(self.screen_width * (share - IMAGE_FRAME_MARGIN))
+                fh = int(self.screen_height * IMAGE_FRAME_HEIGHT)
+
+                # Ingest-time derivative is already near frame size
+                path = display_path(image_path, 'display')
+                img = Image.open(path)
+                ratio = record.aspect if record and record.aspect else img.width / img.height
                 if ratio > fw/fh:
                     nw, nh = fw, int(fw / ratio)
                 else:
                     nh, nw = fh, int(fh * ratio)
-                img = img.resize((nw, nh), Image.Resampling.LANCZOS)
+                if path != image_path and nw > img.width + 1:
+                    # Screens past DISPLAY_SCREEN_SIZE outgrow the derivative; use a larger original instead
+                    original = Image.open(image_path)
+                    if max(original.size) > max(img.size):
+                        img = original
+                img.draft('RGB', (nw, nh))
+                if (nw, nh) != img.size:
+                    img = img.resize((nw, nh), Image.Resampling.LANCZOS)
                 self.photo_image = ImageTk.PhotoImage(img)
+                self._set_image_share(share, matte)
                 self.image_label.config(image=self.photo_image, text="")
                 return
             except Exception as e:
@@ -227,6 +268,7 @@ class PresentationEngine:
 
         pieces = {'title': "\u265A", 'content': "\u265E", 'image': "\u265C",
                   'transition': "\u2026", 'summary': "\u2605"}
+        self._set_image_share(DEFAULT_FRAME_SHARE)
         self.image_label.config(image="", text=pieces.get(slide_type, "\u265F"),
             font=tkfont.Font(family="Segoe UI", size=180))
 
@@ -239,6 +281,7 @@ class PresentationEngine:
         self.source_label.config(text="")
         self.slide_progress_label.config(text="Slide: - / -")
         self.status_label.config(text="LOADING", fg="#fbbf24")
+        self._set_image_share(DEFAULT_FRAME_SHARE)
         self.image_label.config(image="", text="\u265A", font=tkfont.Font(family="Segoe UI", size=180))
         self.root.update_idletasks()
 
@@ -0,0 +1,108 @@
+"""
+Per-Domain Rate Limiter
+Token-bucket politeness scheduler shared by every outgoing request
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from config import HOST_RATE_LIMIT, HOST_BURST, HOST_RATE_OVERRIDES
+
+
+def host_key(url: str) -> str:
+    """Normalize a URL (or bare host) to the host used for rate limiting"""
+    host = urlparse(url).netloc if '://' in url else url
+    host = host.lower().split('@')[-1].split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+class TokenBucket:
+    """
+    Classic token bucket. Callers reserve a token and are told how long to
+    wait for it, so concurrent threads queue up fairly without busy-waiting.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(rate, 1e-6)      # tokens per second
+        self.burst = max(1, burst)       # bucket capacity
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token, returning the seconds the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            # Negative balance = queued reservations ahead of (and including) us
+            return -self._tokens / self.rate
+
+
+class DomainRateLimiter:
+    """Keeps one token bucket per host and records time spent waiting"""
+
+    def __init__(self, rate: float = HOST_RATE_LIMIT, burst: int = HOST_BURST,
+                 overrides: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = dict(HOST_RATE_OVERRIDES if overrides is None else overrides)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _limits_for(self, host: str) -> Tuple[float, int]:
+        """Find configured (rate, burst) for a host, matching parent domains"""
+        for domain, limits in self.overrides.items():
+            if host == domain or host.endswith('.' + domain):
+                return limits
+        return self.rate, self.burst
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(*self._limits_for(host))
+                self._buckets[host] = bucket
+                self._stats[host] = {'requests': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            return bucket
+
+    def acquire(self, url: str) -> float:
+        """Block until the URL's host may be contacted; returns seconds waited"""
+        host = host_key(url)
+        wait = self._bucket(host).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+        with self._lock:
+            stats = self._stats[host]
+            stats['requests'] += 1
+            stats['total_wait'] += wait
+            stats['max_wait'] = max(stats['max_wait'], wait)
+        return wait
+
+    def get_statistics(self) -> Dict[str, Dict[str, float]]:
+        """Per-host request counts and limiter wait times"""
+        with self._lock:
+            return {
+                host: dict(stats, avg_wait=stats['total_wait'] / stats['requests']
+                           if stats['requests'] else 0.0)
+                for host, stats in self._stats.items()
+            }
+
+
+_shared_limiter: Optional[DomainRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> DomainRateLimiter:
+    """Process-wide limiter so every searcher shares per-host pacing"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = DomainRateLimiter()
+        return _shared_limiter
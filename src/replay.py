@@ -0,0 +1,422 @@
+"""
+Record/Replay Web Harness
+Records every GET and DuckDuckGo result to an archive under data/cache,
+replays WebSearcher entirely from it, and serves fixture pages from a
+local stand-in HTTP server, so lesson building can be measured offline.
+
+Usage:
+    python replay.py serve DIR [--port N]      # stand-in server for fixture files
+    python replay.py bench [--topics N]        # lesson-build throughput from the archive
+    python replay.py bench --fixtures DIR      # ... against fixture pages on the stand-in server
+
+Record an archive with:  CHESSMASTER_WEB_MODE=record python main.py
+"""
+import argparse
+import hashlib
+import http.server
+import json
+import mimetypes
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, quote
+
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from config import WEB_MODE, WEB_ARCHIVE_DIR, CHESS_TOPICS, PAGES_PER_TOPIC
+
+WEB_MODES = ('live', 'record', 'replay')
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+SAVE_EVERY = 25   # Archived responses/searches between snapshots of their JSON files
+# Bodies are stored decoded, so transfer headers must not be replayed
+SKIPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive')
+
+
+class WebArchive:
+    """
+    Responses keyed by request URL plus search results keyed by query.
+    Their JSON files are snapshotted every SAVE_EVERY changes and on flush().
+    """
+
+    def __init__(self, archive_dir: Path = WEB_ARCHIVE_DIR):
+        self.archive_dir = Path(archive_dir)
+        self.bodies_dir = self.archive_dir / "bodies"
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.archive_dir / "responses.json"
+        self.searches_file = self.archive_dir / "searches.json"
+        self._lock = threading.Lock()
+        self._responses: Dict[str, dict] = self._load(self.index_file)
+        self._searches: Dict[str, list] = self._load(self.searches_file)
+        self.served = 0
+        self.misses = 0
+        self.recorded = 0
+        self._unsaved = {self.index_file: 0, self.searches_file: 0}
+
+    @staticmethod
+    def _load(path: Path) -> dict:
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Web archive file {path.name} unreadable, starting empty: {e}")
+            return {}
+
+    @staticmethod
+    def _dump(path: Path, data):
+        """Write JSON atomically (caller holds the lock)"""
+        tmp_file = path.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, path)
+
+    def _changed(self, path: Path, data: dict):
+        """Count a change to one file and snapshot it every SAVE_EVERY (caller holds the lock)"""
+        self._unsaved[path] += 1
+        if self._unsaved[path] >= SAVE_EVERY:
+            self._dump(path, data)
+            self._unsaved[path] = 0
+
+    def flush(self):
+        """Persist any archived responses and searches not yet snapshotted"""
+        with self._lock:
+            for path, data in ((self.index_file, self._responses), (self.searches_file, self._searches)):
+                if self._unsaved[path]:
+                    self._dump(path, data)
+                    self._unsaved[path] = 0
+
+    @staticmethod
+    def _search_key(kind: str, query: str, max_results: int) -> str:
+        return f"{kind}\t{query}\t{max_results}"
+
+    def put_response(self, url: str, status: int, reason: str, headers, body: bytes):
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        with open(self.bodies_dir / name, 'wb') as f:
+            f.write(body)
+        entry = {
+            'status': status,
+            'reason': reason or '',
+            'headers': {k.lower(): v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS},
+            'file': name,
+            'size': len(body),
+            'recorded': time.time(),
+        }
+        with self._lock:
+            self._responses[url] = entry
+            self.recorded += 1
+            self._changed(self.index_file, self._responses)
+
+    def get_response(self, url: str):
+        """(entry, body) for an archived URL, or None"""
+        with self._lock:
+            entry = self._responses.get(url)
+        if entry is not None:
+            try:
+                body = (self.bodies_dir / entry['file']).read_bytes()
+                with self._lock:
+                    self.served += 1
+                return entry, body
+            except OSError:
+                pass
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put_search(self, kind: str, query: str, max_results: int, results: List[Dict]):
+        with self._lock:
+            self._searches[self._search_key(kind, query, max_results)] = results
+            self._changed(self.searches_file, self._searches)
+
+    def get_search(self, kind: str, query: str, max_results: int) -> Optional[List[Dict]]:
+        with self._lock:
+            return self._searches.get(self._search_key(kind, query, max_results))
+
+    def search_queries(self, kind: str = 'text') -> List[str]:
+        """Archived queries of one kind, in a stable order"""
+        with self._lock:
+            keys = sorted(self._searches)
+        return [key.split('\t')[1] for key in keys if key.startswith(kind + '\t')]
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                'responses': len(self._responses),
+                'searches': len(self._searches),
+                'served': self.served,
+                'misses': self.misses,
+                'recorded': self.recorded,
+            }
+
+
+def _build_response(request, status: int, reason: str, headers: dict, body: bytes,
+                    adapter: HTTPAdapter) -> Response:
+    response = Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = body if request.method != 'HEAD' else b''
+    response._content_consumed = True
+    response.url = request.url
+    response.request = request
+    response.connection = adapter
+    return response
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Passes requests to the real adapter and archives every GET it answers"""
+
+    def __init__(self, inner: HTTPAdapter, archive: WebArchive):
+        super().__init__()
+        self.inner = inner
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        response = self.inner.send(request, **kwargs)
+        if request.method == 'GET':
+            # Reading here defeats streaming, which is acceptable while recording
+            body = response.content
+            self.archive.put_response(request.url, response.status_code, response.reason,
+                                      response.headers, body)
+        return response
+
+    def close(self):
+        self.archive.flush()
+        self.inner.close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """
+    Answers from the archive and never touches the network. Loopback URLs
+    (the stand-in fixture server) missing from the archive go to `inner`;
+    any other missing URL gets a 404.
+    """
+
+    def __init__(self, inner: HTTPAdapter, archive: WebArchive):
+        super().__init__()
+        self.inner = inner
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        found = self.archive.get_response(request.url)
+        if found is None and urlparse(request.url).hostname in LOOPBACK_HOSTS:
+            return self.inner.send(request, **kwargs)
+        if found is None:
+            return _build_response(request, 404, 'Not In Archive',
+                                   {'content-type': 'text/plain'}, b'', self)
+        entry, body = found
+        return _build_response(request, entry['status'], entry['reason'], entry['headers'], body, self)
+
+    def close(self):
+        self.inner.close()
+
+
+_web_mode = WEB_MODE if WEB_MODE in WEB_MODES else 'live'
+_shared_archive: Optional[WebArchive] = None
+_shared_lock = threading.Lock()
+
+
+def get_web_mode() -> str:
+    return _web_mode
+
+
+def set_web_mode(mode: str):
+    """Choose live/record/replay; must be called before the transport is created"""
+    global _web_mode
+    if mode not in WEB_MODES:
+        raise ValueError(f"Unknown web mode {mode!r}, expected one of {WEB_MODES}")
+    _web_mode = mode
+
+
+def get_archive() -> WebArchive:
+    """Process-wide archive used by record and replay modes"""
+    global _shared_archive
+    with _shared_lock:
+        if _shared_archive is None:
+            _shared_archive = WebArchive()
+        return _shared_archive
+
+
+def wrap_adapter(adapter: HTTPAdapter) -> HTTPAdapter:
+    """The adapter to mount for the current web mode"""
+    if _web_mode == 'record':
+        return RecordingAdapter(adapter, get_archive())
+    if _web_mode == 'replay':
+        return ReplayAdapter(adapter, get_archive())
+    return adapter
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep-alive, like real sites
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Serves a directory of fixture files on a loopback port in a background thread"""
+
+    def __init__(self, directory: Path, port: int = 0):
+        self.directory = Path(directory)
+        handler = partial(_QuietHandler, directory=str(self.directory))
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.port}/{quote(name)}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def populate_stand_in_search(archive: WebArchive, server: FixtureServer,
+                             queries: List[str], max_results: int = 10):
+    """
+    Stand-in search backend: archive text/image results for each query that
+    point at the fixture server. Pages are dealt round-robin so each query
+    gets its own PAGES_PER_TOPIC pages; every query sees all images.
+    """
+    files = sorted(p for p in server.directory.rglob('*') if p.is_file())
+    names = [p.relative_to(server.directory).as_posix() for p in files]
+    images = [n for n in names if (mimetypes.guess_type(n)[0] or '').startswith('image/')]
+    pages = [n for n in names if n not in images]
+
+    for i, query in enumerate(queries):
+        chosen = [pages[(i * PAGES_PER_TOPIC + j) % len(pages)]
+                  for j in range(min(PAGES_PER_TOPIC, len(pages)))] if pages else []
+        text_results = [{'title': Path(n).stem.replace('_', ' '), 'href': server.url(n),
+                         'body': f"Fixture page for {query}"} for n in chosen]
+        archive.put_search('text', query, max_results, text_results)
+        image_results = [{'image': server.url(n), 'thumbnail': server.url(n),
+                          'title': Path(n).stem, 'source': 'fixture'} for n in images]
+        archive.put_search('images', f"{query} chess diagram", 5, image_results)
+
+
+def _bench_worker(topics: int, fixtures: Optional[str]) -> Dict:
+    """Build lessons in replay mode (run in a fresh process with an empty data dir)"""
+    from web_search import WebSearcher
+    from data_manager import DataManager
+    from dataclasses import asdict
+    import replay
+
+    # Run as a script this module is __main__; the searcher's transport reads
+    # the archive held by the imported `replay` module, so use that one
+    archive = replay.get_archive()
+    server = FixtureServer(Path(fixtures)).start() if fixtures else None
+    try:
+        if server is not None:
+            queries = list(CHESS_TOPICS[:topics])
+            populate_stand_in_search(archive, server, queries)
+        else:
+            queries = archive.search_queries('text')[:topics]
+        if not queries:
+            raise SystemExit("Archive has no recorded searches; record one first")
+
+        searcher = WebSearcher()
+        data_manager = DataManager()
+        started = time.monotonic()
+        items = lessons = 0
+        for query in queries:
+            content_items = []
+            for content in searcher.iter_topic_content(query):
+                content_dict = asdict(content)
+                if data_manager.add_content(content_dict):
+                    content_items.append(content_dict)
+            items += len(content_items)
+            if content_items:
+                data_manager.build_lesson(content_items, query)
+                lessons += 1
+        elapsed = time.monotonic() - started
+        searcher.pdfs.shutdown()
+    finally:
+        if server is not None:
+            server.stop()
+
+    return {
+        'topics': len(queries),
+        'lessons': lessons,
+        'content_items': items,
+        'seconds': round(elapsed, 3),
+        'lessons_per_second': round(lessons / elapsed, 2) if elapsed else 0.0,
+        'archive': archive.get_statistics(),
+        'images': searcher.images.get_statistics(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChessMaster offline web harness")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help='Serve fixture files on a local port')
+    serve.add_argument('directory')
+    serve.add_argument('--port', type=int, default=8765)
+
+    bench = sub.add_parser('bench', help='Measure lesson-build throughput offline')
+    bench.add_argument('--topics', type=int, default=10)
+    bench.add_argument('--fixtures', help='Directory of fixture pages and images')
+    bench.add_argument('--archive', default=str(WEB_ARCHIVE_DIR))
+
+    worker = sub.add_parser('_bench-worker')
+    worker.add_argument('--topics', type=int)
+    worker.add_argument('--fixtures')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        server = FixtureServer(Path(args.directory), args.port).start()
+        print(f"Serving {args.directory} at http://127.0.0.1:{server.port}/ (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+
+    elif args.command == 'bench':
+        # A fresh data dir keeps URL store, caches and content from hiding work
+        data_dir = tempfile.mkdtemp(prefix='chessmaster-bench-')
+        archive_dir = Path(args.archive)
+        if args.fixtures:
+            archive_dir = Path(data_dir) / "fixture_archive"  # Leave the real archive alone
+        env = dict(os.environ, CHESSMASTER_DATA_DIR=data_dir, CHESSMASTER_WEB_MODE='replay',
+                   CHESSMASTER_WEB_ARCHIVE=str(archive_dir))
+        command = [sys.executable, __file__, '_bench-worker', '--topics', str(args.topics)]
+        if args.fixtures:
+            command += ['--fixtures', str(Path(args.fixtures).resolve())]
+        try:
+            subprocess.run(command, env=env, check=True)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    else:
+        result = _bench_worker(args.topics, args.fixtures)
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
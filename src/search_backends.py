@@ -0,0 +1,195 @@
+"""
+Search Backends
+Interchangeable sources of search results for a topic query: DuckDuckGo,
+direct chess-site search pages, and the local content corpus (BM25)
+"""
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+try:
+    from duckduckgo_search import DDGS
+    HAS_DDGS = True
+except ImportError:
+    HAS_DDGS = False
+
+from rate_limiter import DomainRateLimiter
+from search_cache import SearchCache
+from text_index import BM25Index
+
+
+@dataclass
+class SearchResult:
+    """Represents a search result"""
+    title: str
+    url: str
+    snippet: str
+    domain: str
+    timestamp: str
+    content_id: Optional[str] = None   # Set when the result is already stored locally
+
+
+class SearchBackend(ABC):
+    """Interface: turn a query into ranked search results"""
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    def search(self, query: str, max_results: int = 10) -> List[SearchResult]:
+        """Up to max_results results for a query, best first"""
+
+
+class DDGSBackend(SearchBackend):
+    """
+    DuckDuckGo text and image search through one long-lived client, with
+    a TTL result cache and record/replay through the web archive
+    """
+    name = "ddgs"
+
+    def __init__(self, search_cache: SearchCache, rate_limiter: DomainRateLimiter,
+                 web_mode: str = 'live', archive=None):
+        self.search_cache = search_cache
+        self.rate_limiter = rate_limiter
+        self.web_mode = web_mode
+        self.archive = archive
+        self._ddgs = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return HAS_DDGS or self.web_mode == 'replay'
+
+    def _get_ddgs(self):
+        """Lazily create the DuckDuckGo client, kept alive across searches"""
+        if self._ddgs is None:
+            self._ddgs = DDGS()
+        return self._ddgs
+
+    def _reset_ddgs(self):
+        """Drop a client that errored so the next search starts fresh"""
+        ddgs, self._ddgs = self._ddgs, None
+        if ddgs is not None and hasattr(ddgs, '__exit__'):
+            try:
+                ddgs.__exit__(None, None, None)
+            except Exception:
+                pass
+
+    def query(self, kind: str, query: str, max_results: int) -> List[Dict]:
+        """Run a DDGS text/images query, answering repeats from the search cache"""
+        if self.web_mode == 'replay':
+            return self.archive.get_search(kind, query, max_results) or []
+
+        cached = self.search_cache.get(kind, query, max_results)
+        if cached is not None:
+            if self.web_mode == 'record' and self.archive.get_search(kind, query, max_results) != cached:
+                # What this session saw must be replayable even when no live search ran
+                self.archive.put_search(kind, query, max_results, cached)
+            return cached
+
+        with self._lock:
+            self.rate_limiter.acquire("https://duckduckgo.com")
+            try:
+                search = getattr(self._get_ddgs(), kind)
+                results = list(search(query, max_results=max_results, safesearch='moderate'))
+            except Exception:
+                self._reset_ddgs()
+                raise
+
+        self.search_cache.put(kind, query, max_results, results)
+        if self.web_mode == 'record':
+            self.archive.put_search(kind, query, max_results, results)
+        return results
+
+    def search(self, query: str, max_results: int = 10) -> List[SearchResult]:
+        results = []
+        for r in self.query('text', query, max_results):
+            url = r.get('href', r.get('link', ''))
+            if url:
+                results.append(SearchResult(
+                    title=r.get('title', 'Chess Content'),
+                    url=url,
+                    snippet=r.get('body', r.get('snippet', '')),
+                    domain=urlparse(url).netloc,
+                    timestamp=datetime.now().isoformat()
+                ))
+        return results
+
+    def search_images(self, query: str, max_results: int = 5) -> List[Dict]:
+        images = []
+        for img in self.query('images', query, max_results):
+            images.append({
+                'url': img.get('image', ''),
+                'thumbnail': img.get('thumbnail', ''),
+                'title': img.get('title', ''),
+                'source': img.get('source', '')
+            })
+        return images
+
+
+class SiteSearchBackend(SearchBackend):
+    """Search-results pages of the big chess sites (no ranking of our own)"""
+    name = "sites"
+
+    SEARCH_URLS = [
+        "https://www.chess.com/article/search?q={query}",
+        "https://lichess.org/search?q={query}",
+    ]
+
+    def search(self, query: str, max_results: int = 10) -> List[SearchResult]:
+        results = []
+        for template in self.SEARCH_URLS[:max_results]:
+            url = template.format(query=query.replace(' ', '+'))
+            results.append(SearchResult(
+                title=f"Chess content: {query}",
+                url=url,
+                snippet=f"Search results for: {query}",
+                domain=urlparse(url).netloc,
+                timestamp=datetime.now().isoformat()
+            ))
+        return results
+
+
+class LocalCorpusBackend(SearchBackend):
+    """
+    Ranks content already stored in data/content with the BM25 index.
+    Needs no network; results carry content_id so callers can load the
+    stored item instead of fetching the URL.
+    """
+    name = "local"
+
+    def __init__(self, index: BM25Index, load_content: Callable[[str], Optional[dict]],
+                 accept: Callable[[str], bool] = None):
+        self.index = index
+        self.load_content = load_content
+        self.accept = accept or (lambda content_id: True)
+
+    @property
+    def available(self) -> bool:
+        return len(self.index) > 0
+
+    def search(self, query: str, max_results: int = 10) -> List[SearchResult]:
+        results = []
+        # Over-fetch a little: unreadable items are skipped
+        for content_id, score in self.index.search(query, k=max_results * 2, accept=self.accept):
+            if len(results) >= max_results:
+                break
+            content = self.load_content(content_id)
+            if not content:
+                continue
+            url = content.get('url', '')
+            excerpts = content.get('excerpts') or ['']
+            results.append(SearchResult(
+                title=content.get('title', 'Chess Content'),
+                url=url,
+                snippet=excerpts[0][:200],
+                domain=urlparse(url).netloc,
+                timestamp=datetime.now().isoformat(),
+                content_id=content_id
+            ))
+        return results
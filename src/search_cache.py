@@ -0,0 +1,89 @@
+"""
+Search Result Cache
+Persistent TTL cache for DuckDuckGo text and image queries
+"""
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import SEARCH_CACHE_FILE, SEARCH_CACHE_TTL, SEARCH_NEGATIVE_TTL
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query"""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+class SearchCache:
+    """
+    Maps (kind, normalized query) to the raw result dicts returned by the
+    search backend. Empty result lists are cached too, with a shorter TTL.
+    """
+
+    def __init__(self, cache_file: Path = SEARCH_CACHE_FILE, ttl: float = SEARCH_CACHE_TTL,
+                 negative_ttl: float = SEARCH_NEGATIVE_TTL):
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except Exception as e:
+            print(f"Search cache unreadable, starting empty: {e}")
+            self._entries = {}
+
+    def _save(self):
+        """Write live entries to disk (caller holds the lock)"""
+        now = time.time()
+        self._entries = {k: e for k, e in self._entries.items() if e['expires'] > now}
+        tmp_file = self.cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+    @staticmethod
+    def _key(kind: str, query: str) -> str:
+        return f"{kind}:{normalize_query(query)}"
+
+    def get(self, kind: str, query: str, max_results: int) -> Optional[List[dict]]:
+        """
+        Cached results for a query, or None on a miss. An empty list is a
+        negative hit: the query recently returned nothing.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(kind, query))
+            usable = (entry is not None and entry['expires'] > time.time()
+                      and (entry['max_results'] >= max_results
+                           or len(entry['results']) < entry['max_results']))
+            if not usable:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry['results'][:max_results]
+
+    def put(self, kind: str, query: str, max_results: int, results: List[dict]):
+        ttl = self.ttl if results else self.negative_ttl
+        with self._lock:
+            self._entries[self._key(kind, query)] = {
+                'results': results,
+                'max_results': max_results,
+                'expires': time.time() + ttl,
+            }
+            self._save()
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
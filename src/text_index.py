@@ -0,0 +1,220 @@
+"""
+Text Index
+Inverted index over stored content with BM25 ranking, persisted to disk
+"""
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import TEXT_INDEX_FILE, TEXT_INDEX_MAX_CHARS, TEXT_INDEX_SAVE_EVERY
+from content_store import ContentStore, get_content_store
+from near_duplicates import get_near_duplicate_index
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have how in is it its of on or that the
+    this to was were what when which who will with you your
+""".split())
+TITLE_WEIGHT = 3   # Title terms count as this many body occurrences
+COMMON_TERM_FRACTION = 0.5   # Terms in more documents than this add ~nothing to BM25
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stopwords, with plurals folded ("pawns" -> "pawn")"""
+    tokens = []
+    for word in WORD_RE.findall(text.lower()):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def content_text(content: dict) -> Tuple[str, str]:
+    """(title, body) of a stored content item, as indexed"""
+    body = ' '.join([content.get('topic', ''), *content.get('excerpts', []),
+                     content.get('text_content', '')[:TEXT_INDEX_MAX_CHARS]])
+    return content.get('title', ''), body
+
+
+class BM25Index:
+    """
+    term -> {doc_id: term frequency} postings with per-document lengths.
+    A query only touches the postings of its own terms, so search time
+    depends on how common the query words are, not on corpus size.
+    Terms found in most documents ("chess") are skipped when the query
+    has rarer ones, so their long postings are never walked. Each
+    document's terms are kept too (rebuilt from the postings on load), so
+    removing or re-indexing a document touches only its own postings.
+    """
+
+    def __init__(self, index_file: Path = TEXT_INDEX_FILE, k1: float = 1.2, b: float = 0.75,
+                 save_every: int = TEXT_INDEX_SAVE_EVERY):
+        self.index_file = Path(index_file)
+        self.k1 = k1
+        self.b = b
+        self.save_every = save_every
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._total_length = 0
+        self._load()
+
+    def _load(self):
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._postings = data['postings']
+            self._lengths = data['lengths']
+            self._total_length = sum(self._lengths.values())
+            for term, postings in self._postings.items():
+                for doc_id in postings:
+                    self._doc_terms.setdefault(doc_id, []).append(term)
+        except Exception as e:
+            print(f"Text index unreadable, rebuilding: {e}")
+            self._postings, self._lengths, self._doc_terms, self._total_length = {}, {}, {}, 0
+
+    def save(self):
+        with self._lock:
+            tmp_file = self.index_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'postings': self._postings, 'lengths': self._lengths}, f)
+            os.replace(tmp_file, self.index_file)
+            self._unsaved = 0
+
+    def flush(self, force: bool = False):
+        """Snapshot once save_every changes have built up (or now, if forced)"""
+        if self._unsaved and (force or self._unsaved >= self.save_every):
+            self.save()
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._lengths
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def doc_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._lengths)
+
+    def add(self, doc_id: str, title: str, body: str):
+        """Index (or re-index) one document"""
+        counts: Dict[str, int] = {}
+        for term in tokenize(title):
+            counts[term] = counts.get(term, 0) + TITLE_WEIGHT
+        for term in tokenize(body):
+            counts[term] = counts.get(term, 0) + 1
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._doc_terms[doc_id] = list(counts)
+            length = sum(counts.values())
+            self._lengths[doc_id] = length
+            self._total_length += length
+            self._unsaved += 1
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        """Drop a document (caller holds the lock)"""
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        self._unsaved += 1
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None and postings.pop(doc_id, None) is not None and not postings:
+                del self._postings[term]
+
+    def search(self, query: str, k: int = 10,
+               accept: Callable[[str], bool] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k (doc_id, score) pairs; `accept` filters the candidate documents.
+        When the query has rare terms, only documents matching one of them
+        are returned, however few: a document sharing nothing but "chess"
+        with the query is off topic, not a weaker match.
+        """
+        terms = set(tokenize(query))
+        accepted: Dict[str, bool] = {}   # accept() result per document seen
+        with self._lock:
+            n = len(self._lengths)
+            if not n or not terms:
+                return []
+            postings_by_term = [self._postings[t] for t in terms if t in self._postings]
+            rare = [p for p in postings_by_term if len(p) <= n * COMMON_TERM_FRACTION]
+            scores = self._score(rare or postings_by_term, accept, accepted)
+        return heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def _score(self, postings_by_term: List[Dict[str, int]], accept: Optional[Callable[[str], bool]],
+               accepted: Dict[str, bool]) -> Dict[str, float]:
+        """BM25 scores of the accepted documents in the given postings (caller holds the lock)"""
+        n = len(self._lengths)
+        avg_length = self._total_length / n
+        scores: Dict[str, float] = {}
+        for postings in postings_by_term:
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if accept is not None:
+                    ok = accepted.get(doc_id)
+                    if ok is None:
+                        ok = accepted[doc_id] = bool(accept(doc_id))
+                    if not ok:
+                        continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def sync(self, store: ContentStore, include: Callable[[str], bool] = None) -> int:
+        """
+        Index stored items not yet indexed and drop deleted ones, plus any
+        that `include` rejects (near-duplicates); returns changes
+        """
+        stored = set(store.ids())
+        if include is not None:
+            stored = {doc_id for doc_id in stored if include(doc_id)}
+        changes = 0
+        for doc_id in set(self._lengths) - stored:
+            self.remove(doc_id)
+            changes += 1
+        for doc_id in stored - set(self._lengths):
+            content = store.get(doc_id)
+            if content is None:
+                continue
+            self.add(doc_id, *content_text(content))
+            changes += 1
+        if changes:
+            self.save()
+        return changes
+
+
+_shared_index: Optional[BM25Index] = None
+_shared_lock = threading.Lock()
+
+
+def get_text_index() -> BM25Index:
+    """
+    Process-wide content index, brought up to date with the content store on
+    first use. DataManager re-syncs once it has fingerprinted stored items.
+    """
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = BM25Index()
+            # Near-duplicates stay out, so they do not skew IDF or the rarity cut-off
+            near_duplicates = get_near_duplicate_index()
+            _shared_index.sync(get_content_store(), include=near_duplicates.__contains__)
+        return _shared_index
@@ -0,0 +1,203 @@
+"""
+Shared HTTP Transport
+One process-wide requests.Session with keep-alive pools sized for our
+fetch concurrency, separate connect/read timeouts, compressed transfer,
+bounded jittered retries and per-host connection statistics
+"""
+import random
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+import requests
+from urllib3.util.retry import Retry
+
+try:
+    import brotli  # noqa: F401 - lets urllib3 decode Content-Encoding: br
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+from config import (
+    USER_AGENT, HTTP_POOL_HOSTS, HTTP_POOL_MAXSIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+    HTTP_RETRIES, HTTP_RETRY_BACKOFF, HTTP_RETRY_STATUSES
+)
+from http_cache import CachingAdapter, HTTPCache, get_http_cache
+from rate_limiter import host_key
+from replay import get_web_mode, wrap_adapter
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if HAS_BROTLI else 'gzip, deflate'
+MAX_RETRY_SLEEP = 10.0
+
+
+class HostStats:
+    """Counters for one host (caller holds the transport lock)"""
+    __slots__ = ('requests', 'retries', 'errors', 'latency_total', 'latency_max',
+                 'new_connections', 'attempts', '_pools')
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.latency_total = 0.0    # Seconds until response headers
+        self.latency_max = 0.0
+        self.new_connections = 0
+        self.attempts = 0
+        # urllib3 pool -> its counters when last seen; weak so LRU-evicted pools can be freed
+        self._pools = weakref.WeakKeyDictionary()
+
+    def observe_pool(self, pool):
+        """Add the pool's connections and requests since it was last seen"""
+        seen_connections, seen_requests = self._pools.get(pool, (0, 0))
+        self.new_connections += pool.num_connections - seen_connections
+        self.attempts += pool.num_requests - seen_requests
+        self._pools[pool] = (pool.num_connections, pool.num_requests)
+
+    def as_dict(self) -> Dict:
+        # Live pools may have served requests (e.g. 304s answered from cache) since last seen
+        new_connections, attempts = self.new_connections, self.attempts
+        for pool, (seen_connections, seen_requests) in list(self._pools.items()):
+            new_connections += pool.num_connections - seen_connections
+            attempts += pool.num_requests - seen_requests
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'errors': self.errors,
+            'avg_latency': round(self.latency_total / self.requests, 3) if self.requests else 0.0,
+            'max_latency': round(self.latency_max, 3),
+            'new_connections': new_connections,
+            'reused_connections': max(0, attempts - new_connections),
+        }
+
+
+class JitterRetry(Retry):
+    """Retry whose sleeps are randomised (so parallel workers do not retry in step) and counted per host"""
+
+    def __init__(self, *args, transport: "Transport" = None, **kwargs):
+        self.transport = transport
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.transport = self.transport
+        return retry
+
+    def get_backoff_time(self) -> float:
+        if not self.history:
+            return 0.0
+        backoff = self.backoff_factor * 2 ** (len(self.history) - 1)
+        return min(MAX_RETRY_SLEEP, backoff) * random.uniform(0.5, 1.5)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        # Raises MaxRetryError once attempts are exhausted, so only real retries are counted
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if self.transport is not None and _pool is not None:
+            self.transport.record_retry(_pool.host)
+        return retry
+
+
+class TransportAdapter(CachingAdapter):
+    """
+    CachingAdapter with pooled keep-alive connections, a retry policy and
+    (connect, read) timeouts. A scalar timeout from a caller is taken as
+    the read timeout; connecting is always bounded by HTTP_CONNECT_TIMEOUT.
+    """
+
+    def __init__(self, cache: HTTPCache, transport: "Transport"):
+        self.transport = transport
+        retry = JitterRetry(
+            total=HTTP_RETRIES, connect=HTTP_RETRIES, read=1, status=HTTP_RETRIES,
+            backoff_factor=HTTP_RETRY_BACKOFF, status_forcelist=HTTP_RETRY_STATUSES,
+            allowed_methods=frozenset({'GET', 'HEAD'}), raise_on_status=False,
+            respect_retry_after_header=True, transport=transport,
+        )
+        # In replay mode only the stand-in server is reached; keep its pages out of the live cache
+        super().__init__(cache, store=get_web_mode() != 'replay', pool_connections=HTTP_POOL_HOSTS,
+                         pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        if not isinstance(timeout, tuple):
+            timeout = (HTTP_CONNECT_TIMEOUT, timeout or HTTP_READ_TIMEOUT)
+        host = host_key(request.url)
+        started = time.monotonic()
+        try:
+            response = super().send(request, stream=stream, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            self.transport.record(host, time.monotonic() - started, error=True)
+            raise
+        self.transport.record(host, time.monotonic() - started)
+        # The pool that served the request carries the connection counters
+        pool = getattr(getattr(response, 'raw', None), '_pool', None)
+        if pool is not None:
+            self.transport.track_pool(host, pool)
+        return response
+
+
+class Transport:
+    """Owns the shared session and its per-host statistics"""
+
+    def __init__(self, cache: HTTPCache = None):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, HostStats] = {}
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': ACCEPT_ENCODING,
+        })
+        # Revalidate previously seen pages/images instead of refetching them
+        self.adapter = TransportAdapter(cache or get_http_cache(), self)
+        # Record/replay modes wrap the real adapter
+        mounted = wrap_adapter(self.adapter)
+        self.session.mount('https://', mounted)
+        self.session.mount('http://', mounted)
+
+    def _host(self, host: str) -> HostStats:
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts[host] = HostStats()
+        return stats
+
+    def track_pool(self, host: str, pool):
+        with self._lock:
+            self._host(host).observe_pool(pool)  # A host gets a new pool after LRU eviction
+
+    def record(self, host: str, latency: float, error: bool = False):
+        with self._lock:
+            stats = self._host(host)
+            stats.requests += 1
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            if error:
+                stats.errors += 1
+
+    def record_retry(self, host: str):
+        with self._lock:
+            self._host(host_key(host)).retries += 1
+
+    def get_statistics(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {host: stats.as_dict() for host, stats in self._hosts.items()}
+
+
+_shared_transport: Optional[Transport] = None
+_shared_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Process-wide transport shared by every searcher and downloader"""
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = Transport()
+        return _shared_transport
+
+
+def get_session() -> requests.Session:
+    return get_transport().session
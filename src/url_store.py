@@ -0,0 +1,277 @@
+"""
+URL Frontier Store
+SQLite-backed record of every URL we have touched, with per-URL status,
+timestamps and content id, fronted by a Bloom filter for O(1) membership
+"""
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import (
+    URL_STORE_DB, URL_STORE_MAX_AGE_DAYS, URL_BLOOM_CAPACITY, URL_BLOOM_ERROR_RATE,
+    CACHE_DIR
+)
+from url_utils import canonicalize_url, CANONICAL_VERSION
+
+# Statuses that mean "do not download this URL again"
+DONE_STATUSES = ('fetched', 'duplicate', 'rejected')
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest"""
+
+    def __init__(self, capacity: int, error_rate: float, bits: bytes = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        size = (self.num_bits + 7) // 8
+        self.bits = bytearray(bits) if bits and len(bits) == size else bytearray(size)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class URLStore:
+    """
+    Per-URL fetch state. Writes are single-row upserts (no whole-file
+    rewrites); membership checks hit the Bloom filter first and only touch
+    SQLite on a possible match. Rows are keyed by canonical URL.
+    """
+
+    BLOOM_SAVE_INTERVAL = 1000  # new URLs between Bloom filter snapshots
+
+    def __init__(self, db_path: Path = URL_STORE_DB, max_age_days: float = URL_STORE_MAX_AGE_DAYS):
+        self.db_path = Path(db_path)
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                content_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS urls_last_seen ON urls(last_seen);
+            CREATE TABLE IF NOT EXISTS content_hashes (
+                hash TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                first_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);
+        """)
+        self._conn.commit()
+        self._unsaved = 0
+        self._load_bloom()
+        if self._meta('canonical_version') != CANONICAL_VERSION:
+            self._canonicalize_keys()
+
+    def _meta(self, key: str):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _load_bloom(self):
+        """Restore the Bloom snapshot and add rows inserted after it was taken"""
+        capacity = URL_BLOOM_CAPACITY
+        count = self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        while capacity < count * 2:
+            capacity *= 2
+
+        watermark = 0
+        bits = self._meta('bloom_bits')
+        if bits is not None and self._meta('bloom_capacity') == capacity:
+            watermark = self._meta('bloom_rowid') or 0
+        else:
+            bits = None
+        self._bloom = BloomFilter(capacity, URL_BLOOM_ERROR_RATE, bits)
+
+        cursor = self._conn.execute("SELECT url FROM urls WHERE rowid > ?", (watermark,))
+        for (url,) in cursor:
+            self._bloom.add(url)
+        if watermark == 0 or self._unsaved:
+            self._save_bloom()
+
+    def _save_bloom(self):
+        """Snapshot the Bloom filter with the rowid it covers (caller holds the lock)"""
+        max_rowid = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM urls").fetchone()[0]
+        self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+            ('bloom_bits', bytes(self._bloom.bits)),
+            ('bloom_capacity', self._bloom.capacity),
+            ('bloom_rowid', max_rowid),
+        ])
+        self._conn.commit()
+        self._unsaved = 0
+
+    def _canonicalize_keys(self):
+        """
+        One-time pass re-keying rows stored under another spelling (before
+        canonical keys, or under older canonicalization rules). When two
+        rows collapse into one, a finished status wins over an unfinished one.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, status, first_seen, last_seen, content_id FROM urls").fetchall()
+            rekeyed = 0
+            for url, status, first_seen, last_seen, content_id in rows:
+                canonical = canonicalize_url(url)
+                if canonical == url:
+                    continue
+                existing = self._conn.execute(
+                    "SELECT status FROM urls WHERE url = ?", (canonical,)).fetchone()
+                if existing is None:
+                    self._conn.execute("UPDATE urls SET url = ? WHERE url = ?", (canonical, url))
+                else:
+                    if status in DONE_STATUSES and existing[0] not in DONE_STATUSES:
+                        self._conn.execute(
+                            "UPDATE urls SET status = ?, content_id = COALESCE(?, content_id) "
+                            "WHERE url = ?", (status, content_id, canonical))
+                    self._conn.execute("""
+                        UPDATE urls SET first_seen = MIN(first_seen, ?), last_seen = MAX(last_seen, ?)
+                        WHERE url = ?""", (first_seen, last_seen, canonical))
+                    self._conn.execute("DELETE FROM urls WHERE url = ?", (url,))
+                rekeyed += 1
+            for body_hash, url in self._conn.execute("SELECT hash, url FROM content_hashes").fetchall():
+                canonical = canonicalize_url(url)
+                if canonical != url:
+                    self._conn.execute("UPDATE content_hashes SET url = ? WHERE hash = ?",
+                                       (canonical, body_hash))
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('canonical_version', ?)",
+                               (CANONICAL_VERSION,))
+            self._conn.commit()
+            if rekeyed:
+                # Old spellings stay set in the Bloom filter: rebuild it
+                self._conn.execute("DELETE FROM meta WHERE key = 'bloom_bits'")
+                self._load_bloom()
+        if rekeyed:
+            print(f"Re-keyed {rekeyed} stored URLs to their canonical form")
+
+    def __contains__(self, url: str) -> bool:
+        return self.get(url) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Stored state for a URL, or None if never seen"""
+        if url not in self._bloom:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, first_seen, last_seen, content_id FROM urls WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        return {'url': url, 'status': row[0], 'first_seen': row[1],
+                'last_seen': row[2], 'content_id': row[3]}
+
+    def is_fetched(self, url: str) -> bool:
+        """True if the URL needs no further download (fetched, duplicate or rejected)"""
+        state = self.get(url)
+        return state is not None and state['status'] in DONE_STATUSES
+
+    def claim_content_hash(self, body_hash: str, url: str) -> Optional[str]:
+        """
+        Register a body hash for a URL. Returns None if the hash is new,
+        otherwise the URL that first produced the same body.
+        """
+        with self._lock:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO content_hashes (hash, url, first_seen) VALUES (?, ?, ?)",
+                (body_hash, url, time.time())).rowcount
+            self._conn.commit()
+            if inserted:
+                return None
+            row = self._conn.execute(
+                "SELECT url FROM content_hashes WHERE hash = ?", (body_hash,)).fetchone()
+        return row[0] if row and row[0] != url else None
+
+    def mark(self, url: str, status: str, content_id: str = None):
+        """Record (or update) a URL's status; content_id is kept if not given"""
+        now = time.time()
+        with self._lock:
+            is_new = url not in self._bloom
+            self._conn.execute("""
+                INSERT INTO urls (url, status, first_seen, last_seen, content_id)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    status = excluded.status,
+                    last_seen = excluded.last_seen,
+                    content_id = COALESCE(excluded.content_id, urls.content_id)
+            """, (url, status, now, now, content_id))
+            self._conn.commit()
+            self._bloom.add(url)
+            if is_new:
+                self._unsaved += 1
+                if self._unsaved >= self.BLOOM_SAVE_INTERVAL:
+                    self._save_bloom()
+
+    def prune(self, max_age_days: float = None) -> int:
+        """Evict URLs not seen within max_age_days; returns how many were removed"""
+        max_age = self.max_age_days if max_age_days is None else max_age_days
+        cutoff = time.time() - max_age * 86400
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM urls WHERE last_seen < ?", (cutoff,)).rowcount
+            self._conn.execute("DELETE FROM content_hashes WHERE first_seen < ?", (cutoff,))
+            self._conn.commit()
+            if removed:
+                # Deleted keys cannot be removed from a Bloom filter: rebuild it
+                self._conn.execute("DELETE FROM meta WHERE key = 'bloom_bits'")
+                self._load_bloom()
+        return removed
+
+    def migrate_json(self, json_file: Path = CACHE_DIR / "searched_urls.json") -> int:
+        """Import the legacy searched_urls.json list (under canonical keys), then retire the file"""
+        if not json_file.exists():
+            return 0
+        try:
+            with open(json_file, 'r') as f:
+                urls = sorted({canonicalize_url(url) for url in json.load(f)})
+        except Exception as e:
+            print(f"Could not migrate {json_file}: {e}")
+            return 0
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, status, first_seen, last_seen) "
+                "VALUES (?, 'fetched', ?, ?)", [(url, now, now) for url in urls])
+            self._conn.commit()
+            for url in urls:
+                self._bloom.add(url)
+            self._save_bloom()
+        json_file.rename(json_file.with_suffix('.json.migrated'))
+        print(f"Migrated {len(urls)} URLs from {json_file.name}")
+        return len(urls)
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._save_bloom()
+            self._conn.close()
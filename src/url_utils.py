@@ -0,0 +1,71 @@
+"""
+URL Canonicalization
+Maps the many spellings of a page URL to one identity key
+"""
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
+from typing import Optional
+
+# Query parameters that only track clicks and never change the page. Generic
+# names such as ref, source or share are left alone: sites use them for content.
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref_src', 'ref_url', 'spm', '_ga', '_gl',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_', 'oly_')
+
+# Bump whenever canonicalize_url() changes; stores keyed by it re-key themselves
+CANONICAL_VERSION = 2
+
+LINK_CANONICAL_RE = re.compile(r'<link\b[^>]*\brel\s*=\s*["\']?canonical\b[^>]*>', re.IGNORECASE)
+HREF_RE = re.compile(r'\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Identity form of a URL: https, lower-case host without www/default port,
+    no fragment, no tracking parameters, sorted query, no trailing slash.
+    Used as a key only - the original URL is still what gets fetched.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https'):
+        return url.strip()
+
+    host = (parts.hostname or '').rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    port = parts.port
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _is_tracking(k))
+
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def find_link_canonical(html: str, base_url: str) -> Optional[str]:
+    """Absolute href of the page's <link rel=canonical>, if it declares one"""
+    # The tag lives in <head>; don't scan whole documents for it
+    head = html[:200000]
+    end = head.lower().find('</head>')
+    if end >= 0:
+        head = head[:end]
+    match = LINK_CANONICAL_RE.search(head)
+    if not match:
+        return None
+    href = HREF_RE.search(match.group(0))
+    if not href:
+        return None
+    value = next(g for g in href.groups() if g is not None).strip()
+    return urljoin(base_url, value) if value else None
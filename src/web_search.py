@@ -3,39 +3,39 @@ Web Search and Content Fetching Module
 Searches the web for chess content and downloads resources
 """
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import time
+from urllib.parse import urljoin
 import random
 import hashlib
-import json
-from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Iterator
 from dataclasses import dataclass, asdict
 from datetime import datetime
-import re
-
-try:
-    from duckduckgo_search import DDGS
-    HAS_DDGS = True
-except ImportError:
-    HAS_DDGS = False
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from config import (
-    USER_AGENT, CHESS_TOPICS, CHESS_DOMAINS,
-    CONTENT_DIR, IMAGES_DIR, CACHE_DIR,
-    MAX_CONTENT_LENGTH, MIN_CONTENT_LENGTH, MAX_IMAGES_PER_TOPIC
+    CHESS_TOPICS, PDFS_DIR,
+    MAX_CONTENT_LENGTH, MIN_CONTENT_LENGTH, MAX_IMAGES_PER_TOPIC,
+    PAGES_PER_TOPIC, FETCH_CONCURRENCY, SEARCH_BACKENDS
 )
-
-
-@dataclass
-class SearchResult:
-    """Represents a search result"""
-    title: str
-    url: str
-    snippet: str
-    domain: str
-    timestamp: str
+from rate_limiter import DomainRateLimiter, get_rate_limiter
+from transport import get_transport
+from replay import get_web_mode, get_archive
+from search_backends import (
+    SearchResult, SearchBackend, DDGSBackend, SiteSearchBackend, LocalCorpusBackend
+)
+from text_index import get_text_index, content_text
+from content_store import get_content_store
+from image_catalog import get_image_catalog
+from search_cache import SearchCache
+from url_store import URLStore
+from url_utils import canonicalize_url, find_link_canonical
+from downloader import Downloader, DownloadRejected, PAGE_KINDS
+from image_store import get_image_ingestor
+from extraction import HTMLExtractor
+from excerpts import default_engine, split_passages
+from pdf_pipeline import PDFPipeline
+from near_duplicates import get_near_duplicate_index
+from host_health import HostBackoff, get_host_health
 
 
 @dataclass
@@ -56,32 +56,79 @@ class ContentItem:
 class WebSearcher:
     """Handles web searching and content fetching for chess topics"""
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': USER_AGENT,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-        })
-        self.searched_urls = set()
+    def __init__(self, max_workers: int = FETCH_CONCURRENCY,
+                 rate_limiter: DomainRateLimiter = None):
+        # Pooled, caching session shared with every other searcher
+        self.transport = get_transport()
+        self.session = self.transport.session
+        self.http_cache = self.transport.adapter.cache
+        self.web_mode = get_web_mode()
+        self.archive = get_archive() if self.web_mode != 'live' else None
+        self.url_store = URLStore()
         self.topic_index = 0
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._in_flight = set()  # URLs currently being fetched by a worker
+        self._lock = threading.Lock()
+        self.search_cache = SearchCache()
+        self.host_health = get_host_health()
+        # Replayed bodies come from the archive and must not land in the live cache
+        self.downloader = Downloader(self._get, head=self._head,
+                                     http_cache=self.http_cache if self.web_mode != 'replay' else None,
+                                     host_health=self.host_health)
+        self.images = get_image_ingestor(self.max_workers, catalog=get_image_catalog())
+        self.extractor = HTMLExtractor()
+        self.excerpt_engine = default_engine
+        self.pdfs = PDFPipeline()
+        self.near_duplicates = get_near_duplicate_index()
+        self.content_store = get_content_store()
+        self.text_index = get_text_index()
+        self.ddgs = DDGSBackend(self.search_cache, self.rate_limiter, self.web_mode, self.archive)
+        self.search_backends = self._create_backends(SEARCH_BACKENDS)
+        self.on_links = None  # Called with (page_url, hrefs) for each parsed HTML page
+        self.is_fresh = None  # Called with a stored content id; False keeps it out of local results
+        self.on_content = None  # Called with the dict of each page saved after its caller stopped listening
         self._load_cache()
 
-    def _load_cache(self):
-        """Load previously searched URLs from cache"""
-        cache_file = CACHE_DIR / "searched_urls.json"
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'r') as f:
-                    self.searched_urls = set(json.load(f))
-            except:
-                self.searched_urls = set()
+    def _create_backends(self, names: List[str]) -> List[SearchBackend]:
+        """Search backends in the configured fallback order"""
+        available = {
+            'ddgs': self.ddgs,
+            'local': LocalCorpusBackend(self.text_index, self.content_store.get,
+                                        accept=self._accept_stored),
+            'sites': SiteSearchBackend(),
+        }
+        return [available[name] for name in names if name in available]
+
+    def _accept_stored(self, content_id: str) -> bool:
+        """
+        Stored items the local backend may offer: never near-duplicates
+        rejected by the data manager, and (once wired to the content pool)
+        nothing already shown, so repeat searches do not replay the same items
+        """
+        return content_id in self.near_duplicates and (
+            self.is_fresh is None or self.is_fresh(content_id))
 
-    def _save_cache(self):
-        """Save searched URLs to cache"""
-        cache_file = CACHE_DIR / "searched_urls.json"
-        with open(cache_file, 'w') as f:
-            json.dump(list(self.searched_urls)[-1000:], f)  # Keep last 1000
+    def _load_cache(self):
+        """Open the URL store, importing the legacy JSON list on first run"""
+        self.url_store.migrate_json()
+        removed = self.url_store.prune()
+        if removed:
+            print(f"Evicted {removed} URLs older than {self.url_store.max_age_days} days")
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the per-host rate limiter, recording the wait on the response"""
+        # Replayed responses never reach a real host, so skip politeness waits
+        waited = self.rate_limiter.acquire(url) if self.web_mode != 'replay' else 0.0
+        response = self.session.get(url, **kwargs)
+        response.limiter_wait = waited
+        return response
+
+    def _head(self, url: str, **kwargs) -> requests.Response:
+        """HEAD through the per-host rate limiter"""
+        if self.web_mode != 'replay':
+            self.rate_limiter.acquire(url)
+        return self.session.head(url, **kwargs)
 
     def get_next_topic(self) -> str:
         """Get the next chess topic to search, cycling through all topics"""
@@ -100,147 +147,147 @@ class WebSearcher:
         return random.choice(variations)
 
     def search_web(self, query: str, max_results: int = 10) -> List[SearchResult]:
-        """Search the web for chess content"""
-        results = []
-
-        if HAS_DDGS:
+        """Search for chess content, trying each backend until one has new results"""
+        for backend in self.search_backends:
+            if not backend.available:
+                continue
             try:
-                with DDGS() as ddgs:
-                    search_results = list(ddgs.text(
-                        query,
-                        max_results=max_results,
-                        safesearch='moderate'
-                    ))
-
-                    for r in search_results:
-                        url = r.get('href', r.get('link', ''))
-                        if url and url not in self.searched_urls:
-                            parsed = urlparse(url)
-                            results.append(SearchResult(
-                                title=r.get('title', 'Chess Content'),
-                                url=url,
-                                snippet=r.get('body', r.get('snippet', '')),
-                                domain=parsed.netloc,
-                                timestamp=datetime.now().isoformat()
-                            ))
+                found = backend.search(query, max_results)
             except Exception as e:
-                print(f"DuckDuckGo search error: {e}")
-
-        # Fallback: Search specific chess sites directly
-        if not results:
-            results = self._search_chess_sites(query)
-
-        return results
-
-    def _search_chess_sites(self, query: str) -> List[SearchResult]:
-        """Fallback search using direct site queries"""
-        results = []
-        search_urls = [
-            f"https://www.chess.com/article/search?q={query.replace(' ', '+')}",
-            f"https://lichess.org/search?q={query.replace(' ', '+')}",
-        ]
-
-        for base_url in search_urls[:2]:  # Limit to avoid rate limiting
-            try:
-                parsed = urlparse(base_url)
-                results.append(SearchResult(
-                    title=f"Chess content: {query}",
-                    url=base_url,
-                    snippet=f"Search results for: {query}",
-                    domain=parsed.netloc,
-                    timestamp=datetime.now().isoformat()
-                ))
-            except:
-                pass
-
-        return results
+                print(f"{backend.name} search error: {e}")
+                continue
+            # Stored results are loaded rather than fetched; others must be new URLs
+            results = [r for r in found
+                       if r.content_id or not self.url_store.is_fetched(canonicalize_url(r.url))]
+            if results:
+                return results
+        return []
 
     def search_images(self, query: str, max_results: int = 5) -> List[Dict]:
         """Search for chess-related images"""
-        images = []
-
-        if HAS_DDGS:
-            try:
-                with DDGS() as ddgs:
-                    image_results = list(ddgs.images(
-                        f"{query} chess diagram",
-                        max_results=max_results,
-                        safesearch='moderate'
-                    ))
-
-                    for img in image_results:
-                        images.append({
-                            'url': img.get('image', ''),
-                            'thumbnail': img.get('thumbnail', ''),
-                            'title': img.get('title', ''),
-                            'source': img.get('source', '')
-                        })
-            except Exception as e:
-                print(f"Image search error: {e}")
-
-        return images
+        if not self.ddgs.available:
+            return []
+        try:
+            return self.ddgs.search_images(f"{query} chess diagram", max_results)
+        except Exception as e:
+            print(f"Image search error: {e}")
+            return []
 
     def fetch_content(self, url: str, topic: str) -> Optional[ContentItem]:
         """Fetch and parse content from a URL"""
-        if url in self.searched_urls:
-            return None
+        canonical = canonicalize_url(url)
+        with self._lock:
+            if canonical in self._in_flight or self.url_store.is_fetched(canonical):
+                return None
+            self._in_flight.add(canonical)
 
+        fetched = False
         try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            content_type = response.headers.get('content-type', '').lower()
+            response = self.downloader.fetch(url, allowed=PAGE_KINDS, timeout=15)
 
-            self.searched_urls.add(url)
-            self._save_cache()
+            self.url_store.mark(canonical, 'fetched')
+            fetched = True
 
-            if 'application/pdf' in content_type:
-                return self._process_pdf(response, url, topic)
-            elif 'text/plain' in content_type:
-                return self._process_text(response, url, topic)
+            duplicate_of = self._find_duplicate(canonical, response)
+            if duplicate_of:
+                print(f"Skipping duplicate {url} (same as {duplicate_of})")
+                self.url_store.mark(canonical, 'duplicate')
+                return None
+
+            if response.kind == 'pdf':
+                content = self._process_pdf(response, response.url, topic)
+            elif response.kind == 'text':
+                content = self._process_text(response, response.url, topic)
             else:
-                return self._process_html(response, url, topic)
+                content = self._process_html(response, response.url, topic)
+
+            if content:
+                self.url_store.mark(canonical, 'fetched', content_id=content.id)
+            return content
 
+        except DownloadRejected as e:
+            print(f"Skipping {url}: {e}")
+            self.url_store.mark(canonical, 'rejected')
+            return None
+        except HostBackoff as e:
+            print(f"Skipping {url}: {e}")
+            return None
         except Exception as e:
             print(f"Error fetching {url}: {e}")
+            if not fetched:
+                # Failed downloads stay eligible for a later retry
+                self.url_store.mark(canonical, 'failed')
             return None
+        finally:
+            with self._lock:
+                self._in_flight.discard(canonical)
+
+    def fetch_page(self, url: str, topic: str) -> Optional[ContentItem]:
+        """Fetch one known URL (no search) and store the resulting content"""
+        content = self.fetch_content(url, topic)
+        if content:
+            self._save_content(content)
+        return content
+
+    def _find_duplicate(self, canonical: str, response) -> Optional[str]:
+        """
+        Post-fetch dedupe: the redirect target, the page's declared
+        <link rel=canonical> and the body hash must all be new to us.
+        Returns the URL this response duplicates, or None.
+        """
+        aliases = [canonicalize_url(response.url)]
+        if response.kind == 'html':
+            declared = find_link_canonical(response.text, response.url)
+            if declared:
+                aliases.append(canonicalize_url(declared))
+
+        for alias in dict.fromkeys(aliases):
+            if alias == canonical:
+                continue
+            if self.url_store.is_fetched(alias):
+                return alias
+            self.url_store.mark(alias, 'fetched')
+
+        body_hash = hashlib.sha1(response.content).hexdigest()
+        return self.url_store.claim_content_hash(body_hash, canonical)
+
+    def _is_near_duplicate(self, content_id: str, text: str, url: str) -> bool:
+        """Register the text's fingerprint, or report the item it nearly repeats"""
+        duplicate_of = self.near_duplicates.check_and_add(content_id, text)
+        if duplicate_of:
+            print(f"Skipping near-duplicate {url} (matches content {duplicate_of})")
+            return True
+        return False
+
+    @staticmethod
+    def _content_id(url: str) -> str:
+        """Stable content id derived from the canonical form of a URL"""
+        return hashlib.md5(canonicalize_url(url).encode()).hexdigest()[:12]
 
     def _process_html(self, response, url: str, topic: str) -> Optional[ContentItem]:
         """Process HTML content"""
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Remove unwanted elements
-        for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'form', 'iframe']):
-            tag.decompose()
+        page = self.extractor.extract(response.text)
 
         # Get title
-        title = soup.title.string if soup.title else topic.title()
+        title = page.title if page.title is not None else topic.title()
         title = title[:200] if title else "Chess Content"
 
-        # Extract main content
-        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|article|post|entry'))
-        if not main_content:
-            main_content = soup.body or soup
-
-        # Get text content
-        text_content = main_content.get_text(separator='\n', strip=True)
-        text_content = re.sub(r'\n{3,}', '\n\n', text_content)  # Reduce multiple newlines
-
+        text_content = page.text_content
         if len(text_content) < MIN_CONTENT_LENGTH:
             return None
 
         text_content = text_content[:MAX_CONTENT_LENGTH]
 
-        # Extract meaningful excerpts (paragraphs)
-        excerpts = []
-        for p in main_content.find_all(['p', 'li', 'h2', 'h3']):
-            text = p.get_text(strip=True)
-            if len(text) > 50 and len(text) < 1000:
-                # Filter for chess-related content
-                chess_keywords = ['chess', 'piece', 'pawn', 'knight', 'bishop', 'rook', 'queen', 'king',
-                                'move', 'checkmate', 'opening', 'endgame', 'tactic', 'strategy',
-                                'position', 'attack', 'defense', 'castle', 'gambit', 'sacrifice']
-                if any(kw in text.lower() for kw in chess_keywords) or len(excerpts) < 3:
-                    excerpts.append(text)
+        if self.on_links is not None and page.link_hrefs:
+            self.on_links(url, page.link_hrefs)
+
+        # Checked before images so redundant pages cost no image downloads
+        content_id = self._content_id(url)
+        if self._is_near_duplicate(content_id, text_content, url):
+            return None
+
+        # Pick the most chess-relevant paragraphs
+        excerpts = self.excerpt_engine.select(page.paragraphs, k=10)
 
         if not excerpts:
             # Fallback: split content into chunks
@@ -249,8 +296,7 @@ class WebSearcher:
 
         # Extract images
         images = []
-        for img in main_content.find_all('img', src=True)[:MAX_IMAGES_PER_TOPIC]:
-            src = img['src']
+        for src in page.image_srcs:
             if not src.startswith('data:'):
                 full_url = urljoin(url, src)
                 if any(ext in full_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
@@ -259,14 +305,12 @@ class WebSearcher:
         # Download images locally
         local_images = self._download_images(images, topic)
 
-        content_id = hashlib.md5(url.encode()).hexdigest()[:12]
-
         return ContentItem(
             id=content_id,
             title=title,
             url=url,
             text_content=text_content,
-            excerpts=excerpts[:10],
+            excerpts=excerpts,
             images=images,
             topic=topic,
             source_type='html',
@@ -275,35 +319,33 @@ class WebSearcher:
         )
 
     def _process_pdf(self, response, url: str, topic: str) -> Optional[ContentItem]:
-        """Process PDF content (save for later extraction)"""
-        content_id = hashlib.md5(url.encode()).hexdigest()[:12]
-        from config import PDFS_DIR
+        """Process PDF content: save it, then extract text in the PDF pipeline"""
+        content_id = self._content_id(url)
 
         # Save PDF
         pdf_path = PDFS_DIR / f"{content_id}.pdf"
         with open(pdf_path, 'wb') as f:
             f.write(response.content)
 
-        # Basic text extraction attempt
-        text_content = f"PDF Document about {topic}"
-        try:
-            import PyPDF2
-            pdf_path_str = str(pdf_path)
-            with open(pdf_path_str, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                text_parts = []
-                for page in reader.pages[:10]:  # First 10 pages
-                    text_parts.append(page.extract_text() or '')
-                text_content = '\n'.join(text_parts)[:MAX_CONTENT_LENGTH]
-        except:
-            pass
+        pdf = self.pdfs.extract(pdf_path, response.content)
+        text_content = pdf.text[:MAX_CONTENT_LENGTH] or f"PDF Document about {topic}"
+        if pdf.text and self._is_near_duplicate(content_id, text_content, url):
+            return None
+
+        # Best passage of each page, then the strongest pages in page order
+        page_excerpts = []
+        for page_text in pdf.pages:
+            page_excerpts.extend(self.excerpt_engine.select(split_passages(page_text), k=1))
+        excerpts = self.excerpt_engine.select(page_excerpts, k=10) or [text_content[:500]]
+
+        title = pdf.title[:200] if pdf.title else f"Chess PDF: {topic}"
 
         return ContentItem(
             id=content_id,
-            title=f"Chess PDF: {topic}",
+            title=title,
             url=url,
             text_content=text_content,
-            excerpts=[text_content[:500]] if text_content else [],
+            excerpts=excerpts,
             images=[],
             topic=topic,
             source_type='pdf',
@@ -318,11 +360,12 @@ class WebSearcher:
         if len(text_content) < MIN_CONTENT_LENGTH:
             return None
 
-        content_id = hashlib.md5(url.encode()).hexdigest()[:12]
+        content_id = self._content_id(url)
+        if self._is_near_duplicate(content_id, text_content, url):
+            return None
 
-        # Split into excerpts
-        paragraphs = text_content.split('\n\n')
-        excerpts = [p.strip() for p in paragraphs if len(p.strip()) > 50][:10]
+        # Split into passages and keep the most relevant
+        excerpts = self.excerpt_engine.select(split_passages(text_content), k=10)
 
         return ContentItem(
             id=content_id,
@@ -338,92 +381,103 @@ class WebSearcher:
         )
 
     def _download_images(self, image_urls: List[str], topic: str) -> List[str]:
-        """Download images and return local paths"""
-        local_paths = []
-        topic_dir = IMAGES_DIR / topic.replace(' ', '_')[:30]
-        topic_dir.mkdir(parents=True, exist_ok=True)
-
-        for url in image_urls[:MAX_IMAGES_PER_TOPIC]:
-            try:
-                response = self.session.get(url, timeout=10)
-                if response.status_code == 200:
-                    # Determine extension
-                    content_type = response.headers.get('content-type', '')
-                    ext = '.jpg'
-                    if 'png' in content_type:
-                        ext = '.png'
-                    elif 'gif' in content_type:
-                        ext = '.gif'
-                    elif 'webp' in content_type:
-                        ext = '.webp'
-
-                    filename = hashlib.md5(url.encode()).hexdigest()[:10] + ext
-                    filepath = topic_dir / filename
-
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
-
-                    local_paths.append(str(filepath))
-            except Exception as e:
-                print(f"Error downloading image {url}: {e}")
-
-            time.sleep(0.2)  # Rate limiting
-
-        return local_paths
+        """Download images in parallel and return unique local paths"""
+        return self.images.ingest(image_urls[:MAX_IMAGES_PER_TOPIC], topic, self.downloader)
 
     def fetch_topic_content(self, topic: str = None) -> List[ContentItem]:
         """Search and fetch content for a chess topic"""
+        return list(self.iter_topic_content(topic))
+
+    def iter_topic_content(self, topic: str = None,
+                           max_workers: int = None) -> Iterator[ContentItem]:
+        """
+        Search and fetch content for a chess topic concurrently.
+        Pages and the topic image search run on a bounded thread pool;
+        content items are yielded (and saved) as each page finishes. A
+        caller that stops early does not wait for the remaining fetches;
+        their pages are saved when they finish.
+        """
         if topic is None:
             topic = self.get_next_topic()
 
         print(f"Searching for: {topic}")
         results = self.search_web(topic)
-        content_items = []
 
-        for result in results[:5]:  # Limit to 5 pages per topic
-            content = self.fetch_content(result.url, topic)
+        # Results already in the local corpus need no fetch
+        stored = []
+        for result in results:
+            if result.content_id and len(stored) < PAGES_PER_TOPIC:
+                content = self.content_store.get(result.content_id)
+                if content:
+                    stored.append(ContentItem(**{f: content.get(f) for f in ContentItem.__dataclass_fields__}))
+        results = [r for r in results if not r.content_id]
+
+        # Drop URL variants of the same page so two workers never fetch it twice
+        urls, seen = [], set()
+        for result in results:
+            key = canonicalize_url(result.url)
+            if not self.host_health.is_available(result.url):
+                continue  # Leave the slot to a page on a healthy host
+            if key not in seen:
+                seen.add(key)
+                urls.append(result.url)
+        urls = urls[:PAGES_PER_TOPIC]
+
+        pool = ThreadPoolExecutor(max_workers=max_workers or self.max_workers,
+                                  thread_name_prefix="page-fetch")
+        # Also search for images alongside the page fetches
+        image_future = pool.submit(self._fetch_topic_images, topic)
+        page_futures = [pool.submit(self.fetch_content, url, topic) for url in urls]
+        pending = set(page_futures)
+        try:
+            yield from stored
+
+            for future in as_completed(page_futures):
+                pending.discard(future)
+                content = future.result()
+                if content:
+                    # Save content to disk
+                    self._save_content(content)
+                    yield content
+
+            image_future.result()
+        finally:
+            # Closed early: the URLs are already marked fetched, so keep what they return
+            for future in pending:
+                future.add_done_callback(self._save_finished)
+            pool.shutdown(wait=False)
+
+    def _save_finished(self, future):
+        """Save a page that finished after its caller stopped listening"""
+        try:
+            content = future.result()
             if content:
-                content_items.append(content)
-                # Save content to disk
                 self._save_content(content)
-            time.sleep(0.5)  # Rate limiting
-
-        # Also search for images
-        images = self.search_images(topic)
-        if images:
-            self._download_search_images(images, topic)
+                if self.on_content is not None:
+                    self.on_content(asdict(content))
+        except Exception as e:
+            print(f"Fetch error: {e}")
 
-        return content_items
+    def _fetch_topic_images(self, topic: str):
+        """Worker task: search for topic images and download them"""
+        try:
+            images = self.search_images(topic)
+            if images:
+                self._download_search_images(images, topic)
+        except Exception as e:
+            print(f"Image fetch error: {e}")
 
     def _save_content(self, content: ContentItem):
-        """Save content item to disk"""
-        content_file = CONTENT_DIR / f"{content.id}.json"
-        with open(content_file, 'w', encoding='utf-8') as f:
-            json.dump(asdict(content), f, indent=2, ensure_ascii=False)
-
-    def _download_search_images(self, images: List[Dict], topic: str):
-        """Download images from search results"""
-        topic_dir = IMAGES_DIR / topic.replace(' ', '_')[:30]
-        topic_dir.mkdir(parents=True, exist_ok=True)
-
-        for img in images[:5]:
-            url = img.get('url') or img.get('thumbnail')
-            if url:
-                try:
-                    response = self.session.get(url, timeout=10)
-                    if response.status_code == 200:
-                        ext = '.jpg'
-                        if 'png' in response.headers.get('content-type', ''):
-                            ext = '.png'
-
-                        filename = hashlib.md5(url.encode()).hexdigest()[:10] + ext
-                        filepath = topic_dir / filename
-
-                        with open(filepath, 'wb') as f:
-                            f.write(response.content)
-                except:
-                    pass
-                time.sleep(0.3)
+        """Save content item to the content store and add it to the local search index"""
+        content_dict = asdict(content)
+        self.content_store.put(content_dict)
+        self.text_index.add(content.id, *content_text(content_dict))
+        self.text_index.flush()
+
+    def _download_search_images(self, images: List[Dict], topic: str) -> List[str]:
+        """Download images from search results in parallel"""
+        urls = [img.get('url') or img.get('thumbnail') for img in images[:5]]
+        return self.images.ingest(urls, topic, self.downloader)
 
 
 # Quick test
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Modules import each other flatly from src/, and config creates its data
+# folders on import, so point it at a throwaway directory first
+os.environ.setdefault("CHESSMASTER_DATA_DIR", tempfile.mkdtemp(prefix="chessmaster-test-"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
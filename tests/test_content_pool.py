@@ -0,0 +1,61 @@
+from content_pool import ContentPool
+
+
+def make_pool(tmp_path, count, keep_recent=50):
+    pool = ContentPool(tmp_path / "watch_history.log", keep_recent=keep_recent)
+    pool.load(f"item{i}" for i in range(count))
+    return pool
+
+
+def test_pool_smaller_than_keep_recent_keeps_cycling(tmp_path):
+    pool = make_pool(tmp_path, 46)
+    first_round = [pool.draw() for _ in range(46)]
+    assert sorted(first_round) == sorted(f"item{i}" for i in range(46))
+    # Fresh is empty; the older half comes back instead of nothing at all
+    later = [pool.draw() for _ in range(46)]
+    assert None not in later
+    assert pool.get_statistics()['recycles'] >= 1
+    assert set(later[:23]) <= set(first_round[:23])
+
+
+def test_pool_cycles_again_after_restart(tmp_path):
+    pool = make_pool(tmp_path, 5)
+    for _ in range(5):
+        pool.draw()
+    assert make_pool(tmp_path, 5).draw() is not None
+
+
+def test_draw_gives_each_fresh_item_once_before_recycling(tmp_path):
+    pool = make_pool(tmp_path, 10, keep_recent=3)
+    drawn = [pool.draw() for _ in range(10)]
+    assert sorted(drawn) == sorted(f"item{i}" for i in range(10))
+    assert pool.fresh_count() == 0
+    assert pool.get_statistics()['recycles'] == 0
+
+
+def test_recycle_holds_back_the_most_recently_watched(tmp_path):
+    pool = make_pool(tmp_path, 10, keep_recent=3)
+    drawn = [pool.draw() for _ in range(10)]
+    pool.draw()
+    # Seven oldest went back to fresh (one of them drawn again just now)
+    assert pool.fresh_count() == 6
+    assert not any(pool.is_fresh(content_id) for content_id in drawn[-3:])
+
+
+def test_marked_items_leave_fresh_and_are_remembered(tmp_path):
+    pool = make_pool(tmp_path, 3)
+    pool.mark_watched('item1')
+    assert not pool.is_fresh('item1')
+    assert pool.fresh_count() == 2
+    restarted = make_pool(tmp_path, 3)
+    assert not restarted.is_fresh('item1')
+    assert restarted.fresh_count() == 2
+
+
+def test_added_items_are_fresh_once(tmp_path):
+    pool = make_pool(tmp_path, 0)
+    assert pool.draw() is None
+    pool.add('new')
+    pool.add('new')
+    assert pool.fresh_count() == 1
+    assert pool.draw() == 'new'
@@ -0,0 +1,54 @@
+from content_store import ContentCache, ContentStore, encode_content
+
+
+def make_item(content_id, text='x'):
+    return {'id': content_id, 'title': f'Title {content_id}', 'url': f'https://example.com/{content_id}',
+            'topic': 'endgame', 'source_type': 'web', 'timestamp': '2024-01-01T00:00:00',
+            'excerpts': [text], 'local_images': []}
+
+
+def test_put_and_get_round_trip(tmp_path):
+    store = ContentStore(tmp_path / "content.db")
+    item = make_item('a', 'King and pawn endings')
+    size = store.put(item)
+    assert size == len(encode_content(item).encode('utf-8'))
+    assert store.get('a') == item
+    assert store.size_of('a') == size
+    assert 'a' in store and len(store) == 1
+    assert store.get('missing') is None and store.size_of('missing') is None
+
+
+def test_put_replaces_and_metadata_skips_bodies(tmp_path):
+    store = ContentStore(tmp_path / "content.db")
+    store.put(make_item('a'))
+    store.put(make_item('a', 'longer excerpt'))
+    assert len(store) == 1
+    assert store.get('a')['excerpts'] == ['longer excerpt']
+    meta = next(store.iter_metadata())
+    assert meta['id'] == 'a' and meta['excerpt_count'] == 1 and 'excerpts' not in meta
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    store = ContentStore(tmp_path / "content.db")
+    items = [make_item(c) for c in 'abc']
+    size = store.put(items[0])
+    cache = ContentCache(store, max_bytes=2 * size)
+    for item in items:
+        cache.put(item)
+    assert cache.get_statistics()['cached_items'] == 2
+    assert cache.get('b') == items[1] and cache.get('c') == items[2]
+    assert cache.get_statistics()['hits'] == 2
+    # 'a' was evicted, so it comes from the store (and evicts 'b', now the oldest)
+    assert cache.get('a') == items[0]
+    assert cache.get_statistics()['misses'] == 1
+    cache.get('b')
+    assert cache.get_statistics()['misses'] == 2
+
+
+def test_remember_caches_only_stored_items(tmp_path):
+    store = ContentStore(tmp_path / "content.db")
+    store.put(make_item('a'))
+    cache = ContentCache(store)
+    assert cache.remember(make_item('a'))
+    assert not cache.remember(make_item('b'))
+    assert cache.get_statistics()['cached_items'] == 1
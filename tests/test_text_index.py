@@ -0,0 +1,28 @@
+from text_index import BM25Index
+
+
+def make_index(tmp_path):
+    index = BM25Index(tmp_path / "index.json")
+    index.add('a', 'Endgame basics', 'endgame')
+    index.add('b', 'More endgame', 'endgame')
+    for i in range(6):
+        index.add(f'c{i}', 'Technique', 'technique')
+    return index
+
+
+def test_search_prefers_rare_terms(tmp_path):
+    index = make_index(tmp_path)
+    assert {doc_id for doc_id, _ in index.search('endgame technique', k=2)} == {'a', 'b'}
+
+
+def test_search_returns_no_off_topic_docs_when_rare_matches_are_rejected(tmp_path):
+    index = make_index(tmp_path)
+    # 'technique' is in most documents; matching only it is not a topic match
+    assert index.search('endgame technique', k=3, accept=lambda doc_id: doc_id not in {'a', 'b'}) == []
+
+
+def test_remove_drops_only_that_document(tmp_path):
+    index = make_index(tmp_path)
+    index.remove('a')
+    assert 'a' not in index
+    assert [doc_id for doc_id, _ in index.search('endgame')] == ['b']
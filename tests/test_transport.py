@@ -0,0 +1,31 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from transport import Transport
+
+
+class AlwaysFailing(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(500)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_retries_count_only_attempts_actually_retried(monkeypatch):
+    monkeypatch.setattr('transport.MAX_RETRY_SLEEP', 0.0)
+    server = HTTPServer(('127.0.0.1', 0), AlwaysFailing)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        transport = Transport()
+        response = transport.session.get(f"http://127.0.0.1:{server.server_port}/")
+        assert response.status_code == 500
+        stats = transport.get_statistics()['127.0.0.1']
+        # HTTP_RETRIES = 2: three attempts, two of them retries
+        assert stats['retries'] == 2
+        assert stats['requests'] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
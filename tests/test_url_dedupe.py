@@ -0,0 +1,38 @@
+from url_store import URLStore
+from url_utils import canonicalize_url, find_link_canonical
+
+
+def test_spellings_of_one_page_share_a_canonical_form():
+    expected = 'https://chess.com/article/view/endgames?a=1&b=2'
+    for url in ('http://www.chess.com/article/view/endgames/?b=2&a=1',
+                'https://WWW.Chess.com:443/article//view/endgames?utm_source=x&a=1&b=2#top',
+                'https://chess.com/article/view/endgames?a=1&fbclid=abc&b=2'):
+        assert canonicalize_url(url) == expected
+
+
+def test_content_parameters_and_ports_are_kept():
+    assert canonicalize_url('https://chess.com/search?ref=opening') == 'https://chess.com/search?ref=opening'
+    assert canonicalize_url('http://127.0.0.1:8765/page.html') == 'https://127.0.0.1:8765/page.html'
+    assert canonicalize_url('mailto:someone@example.com') == 'mailto:someone@example.com'
+
+
+def test_link_canonical_is_read_from_head_only():
+    html = ('<html><head><link href="/lesson/1" rel="canonical"></head>'
+            '<body><link rel="canonical" href="/other"></body></html>')
+    assert find_link_canonical(html, 'https://chess.com/lesson/1?x=2') == 'https://chess.com/lesson/1'
+    assert find_link_canonical('<html><head></head></html>', 'https://chess.com/') is None
+
+
+def test_store_tracks_status_and_duplicate_bodies(tmp_path):
+    store = URLStore(tmp_path / "urls.db")
+    url = canonicalize_url('https://www.chess.com/article/a')
+    assert not store.is_fetched(url)
+    store.mark(url, 'failed')
+    assert not store.is_fetched(url)
+    store.mark(url, 'fetched', content_id='c1')
+    store.mark(url, 'fetched')
+    assert store.is_fetched(url) and store.get(url)['content_id'] == 'c1'
+
+    assert store.claim_content_hash('h1', url) is None
+    assert store.claim_content_hash('h1', url) is None   # Same URL again is not a duplicate
+    assert store.claim_content_hash('h1', 'https://chess.com/article/b') == url